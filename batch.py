@@ -0,0 +1,117 @@
+''' Run many simulations on a pool of processes. A job is a dict with the
+instruction file, the config (a dict or the path of a config file) and
+the output folder of the log files:
+
+    {"script": "lab.txt", "config": {"signal-time": 3, "error-detection": "crc-16"}, "output": "./out/lab_3_crc"}
+
+    python batch.py jobs.json --workers 4 --output results.json
+
+The file can also be {"scripts": [...], "configs": [...], "output": folder},
+then every script is simulated with every config.
+
+Every simulation has its own simulator, devices and output folder, so a
+worker process runs several jobs one after the other '''
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from event_log import DATA, EVENT_LOG_FILE, read_events
+from initializer import Initializer
+from profiler import Profiler
+from simulator_singleton import create_simulator
+
+def load_job_config(job):
+    ''' Return an Initializer with the config of the job '''
+    config = job.get("config", {})
+    if isinstance(config, str):
+        init = Initializer(config)
+        init.load_config()
+    else:
+        init = Initializer()
+        init.config = dict(config)
+    init.config["script-name"] = job["script"]
+    return init
+
+def summary(output_dir):
+    ''' Number of frames received by the hosts and how many of them have errors '''
+    frames, errors = 0, 0
+    # with the binary format the frames are the DATA events, the value is if the frame has no errors
+    if os.path.exists(os.path.join(output_dir, EVENT_LOG_FILE)):
+        for event in read_events(os.path.join(output_dir, EVENT_LOG_FILE)):
+            if event[3] == DATA:
+                frames += 1
+                errors += 0 if event[4] else 1
+    for name in os.listdir(output_dir):
+        if not name.endswith("_data.txt"):
+            continue
+        with open(os.path.join(output_dir, name)) as f:
+            for line in f:
+                frames += 1
+                if line.rstrip().endswith("ERROR"):
+                    errors += 1
+    return frames, errors
+
+def run_job(job):
+    ''' Simulate a job and return its timing and summary '''
+    result = {"script": job["script"], "config": job.get("config", {}), "output": job["output"]}
+    start = time.perf_counter()
+    try:
+        init = load_job_config(job)
+        os.makedirs(job["output"], exist_ok=True)
+        simulator = create_simulator(init, job["output"])
+        try:
+            simulator.run()
+        finally:
+            simulator.close()
+            Profiler.close()
+        result["time"] = time.perf_counter() - start
+        result["simulation_time"] = simulator.simulation_time
+        result["devices"] = len(simulator.storage.devices)
+        result["frames"], result["frame_errors"] = summary(job["output"])
+    except Exception as e:
+        result["time"] = time.perf_counter() - start
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+def run_batch(jobs, workers=None):
+    ''' Run the jobs on a pool of workers processes (as many as CPU by
+    default) and return their results in the order of the jobs '''
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_job, jobs))
+
+def sweep(scripts, configs, output_dir):
+    ''' Return the jobs of every script with every config, the output of
+    each job is a folder of output_dir '''
+    jobs = []
+    for (i, script), (j, config) in itertools.product(enumerate(scripts), enumerate(configs)):
+        name = os.path.splitext(os.path.basename(script))[0]
+        jobs.append({"script": script, "config": config, "output": os.path.join(output_dir, f"{i}_{name}_{j}")})
+    return jobs
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a batch of simulations on a pool of processes")
+    parser.add_argument("jobs", help="JSON file with the list of jobs")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes, the number of CPU by default")
+    parser.add_argument("--output", default=None, help="JSON file of the results, stdout by default")
+    args = parser.parse_args()
+
+    with open(args.jobs) as f:
+        jobs = json.load(f)
+    # {"scripts": [...], "configs": [...], "output": folder} is the sweep of every script with every config
+    if isinstance(jobs, dict):
+        jobs = sweep(jobs["scripts"], jobs["configs"], jobs["output"])
+    start = time.perf_counter()
+    results = run_batch(jobs, args.workers)
+    report = {"workers": args.workers or os.cpu_count(), "time": time.perf_counter() - start, "jobs": results}
+
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if any("error" in result for result in results):
+        sys.exit(1)
@@ -0,0 +1,393 @@
+''' Microbenchmarks of the hot paths of the simulator. The results are
+written as JSON so they can be compared between commits:
+
+    python benchmark.py --output bench.json
+    python benchmark.py --compare bench.json
+
+Every benchmark is seeded, so two runs with the same seed measure the
+same payloads, MACs and topologies '''
+import argparse
+import json
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from logger import Logger
+from devices import Host, Hub, Switch
+from storage_device import Storage_Device
+from wire_table import Wire_Table, np
+from frame import Frame
+from hash_strategy import Hash_Detection
+from parity_strategy import Parity_Detection
+from crc_strategy import CRC16_Detection
+from util import mult_x, INIT_FRAME_BIT
+
+# the CRC-16 detection code carries the data, so the payload must leave room for it in a size byte
+PAYLOAD_SIZES = [1, 16, 64, 128]
+HUB_PORTS = [4, 8, 16]
+HUB_DEPTHS = [1, 4, 8]
+# wire backends of the hub benchmarks, numpy only if it is installed
+WIRE_BACKENDS = ["objects"] + (["numpy"] if np is not None else [])
+MAC_TABLE_SIZES = [16, 256, 1024, 4096]
+SIGNAL_TIME = 10
+# frames of the batch benchmarks of the detection strategies, the big batches use array operations
+BATCH_FRAMES = [64, 1024]
+# devices of the memory report
+MEMORY_HOSTS = 1000
+MEMORY_SWITCH_PORTS = 256
+# bytes of the memory report (CPython 3.11) at the last intended change of
+# the devices, --memory fails if a figure is more than MEMORY_THRESHOLD
+# times its baseline. Update it when a device must grow
+MEMORY_BASELINE = {"host": 3508, "switch_port": 276, "switch_queued_frame": 318}
+MEMORY_THRESHOLD = 1.05
+
+class Bench_Network:
+    ''' A network that answers the events of its devices without the
+    simulator, the devices are stored in their own Storage_Device with
+    the wires of the backend '''
+    def __init__(self, output_dir, signal_time=SIGNAL_TIME, wire_backend="objects"):
+        self.storage = Storage_Device(Wire_Table() if wire_backend == "numpy" else None)
+        self.output_dir = output_dir
+        self.signal_time = signal_time
+        self.simulation_time = 0
+        self.wires = []
+
+    def add(self, device):
+        self.storage.add(device)
+        device.logger.askForSimulationTime += self.get_time
+        device.askSignalTime += self.get_signal_time
+        device.consultDevice += self.storage.get_device
+        device.consultDeviceMap += self.storage.get_index
+        device.askCountDevice += self.storage.__len__
+        device.askSimulationTime += self.get_time
+        device.scheduleEvent += self.schedule
+        if isinstance(device, Host):
+            device.data_logger.askForSimulationTime += self.get_time
+        elif isinstance(device, Switch):
+            device.refresh_time()
+        return device
+
+    def host(self, name):
+        return self.add(Host(name, output_dir=self.output_dir))
+
+    def hub(self, name, no_ports):
+        return self.add(Hub(name, no_ports, self.output_dir))
+
+    def switch(self, name, no_ports, max_macs):
+        return self.add(Switch(name, no_ports, max_macs=max_macs, output_dir=self.output_dir))
+
+    def connect(self, device_1, port_1, device_2, port_2):
+        ''' Connect two ports as the Connector does, device_1 sends by red cable '''
+        wire = self.storage.new_wire('wire' + str(len(self.storage)), device_1.name + "_" + str(port_1 + 1), device_2.name + "_" + str(port_2 + 1))
+        self.storage.add(wire)
+        device_1.ports[port_1] = wire.name + '_1'
+        device_2.ports[port_2] = wire.name + '_2'
+        device_1.cable_send[port_1] = True
+        device_2.cable_send[port_2] = False
+        self.storage.connect(wire, device_1, port_1, device_2, port_2)
+        self.wires.append(wire)
+        return wire
+
+    def clean(self):
+        if self.storage.wire_table is not None:
+            self.storage.wire_table.clean()
+            return
+        for wire in self.wires:
+            wire.clean()
+
+    def get_time(self):
+        return self.simulation_time
+
+    def get_signal_time(self):
+        return self.signal_time
+
+    def schedule(self, time):
+        pass
+
+def random_payload(rnd, size):
+    return bytes(rnd.getrandbits(8) for _ in range(size))
+
+def random_mac(rnd):
+    return mult_x(bin(rnd.getrandbits(16))[2:], 16)
+
+def bytes_bits(data):
+    return "".join(mult_x(bin(b)[2:], 8) for b in data)
+
+#region benchmarks
+# every benchmark is a generator of (name, params, function to measure), the
+# devices write their logs on output_dir
+
+def bench_detection(rnd, output_dir):
+    for strategy in [Hash_Detection(), Parity_Detection(), CRC16_Detection()]:
+        name = type(strategy).__name__
+        for size in PAYLOAD_SIZES:
+            data = random_payload(rnd, size)
+            bits = bytes_bits(data)
+            frame = Frame(rnd.getrandbits(16), rnd.getrandbits(16), data, strategy.apply_bytes(data))
+            frame_bits = frame.to_bits()
+            params = {"payload_bytes": size}
+            yield f"{name}.apply", params, lambda s=strategy, b=bits: s.apply(b)
+            yield f"{name}.apply_bytes", params, lambda s=strategy, d=data: s.apply_bytes(d)
+            yield f"{name}.check", params, lambda s=strategy, f=frame_bits: s.check(f)
+            yield f"{name}.check_frame", params, lambda s=strategy, f=frame: s.check_frame(f)
+
+            for count in BATCH_FRAMES:
+                datas = [random_payload(rnd, size) for _ in range(count)]
+                buffer = b"".join(Frame(rnd.getrandbits(16), rnd.getrandbits(16), d, strategy.apply_bytes(d)).encode() for d in datas)
+                batch = {"payload_bytes": size, "frames": count}
+                yield f"{name}.apply_many", batch, lambda s=strategy, d=datas: s.apply_many(d)
+                yield f"{name}.check_many", batch, lambda s=strategy, b=buffer: s.check_many(b)
+
+def bench_frame(rnd, output_dir):
+    for size in PAYLOAD_SIZES:
+        data = random_payload(rnd, size)
+        frame = Frame(rnd.getrandbits(16), rnd.getrandbits(16), data, CRC16_Detection().apply_bytes(data))
+        buffer = frame.encode()
+        frame_bits = frame.to_bits()
+        params = {"payload_bytes": size}
+        yield "Frame.decode", params, lambda b=buffer: Frame.decode(b)
+        yield "Frame.from_bits", params, lambda f=frame_bits: Frame.from_bits(f)
+        yield "Frame.to_bits", params, frame.to_bits
+
+def bench_host_read(rnd, output_dir):
+    ''' Feed a host with the bits of a frame, every bit is held signal
+    time ms as on the wire, one call receives a whole frame '''
+    for size in PAYLOAD_SIZES:
+        network = Bench_Network(output_dir)
+        host = network.host("bench_host")
+        peer = network.host("bench_peer")
+        network.connect(peer, 0, host, 0)
+        host.set_MAC(random_mac(rnd))
+        host.detection = CRC16_Detection()
+        data = random_payload(rnd, size)
+        frame = Frame(int(host.MAC, 2), rnd.getrandbits(16), data, host.detection.apply_bytes(data))
+        stream = [bit for bit in frame.to_bits() for _ in range(network.signal_time)] + [None] * network.signal_time
+
+        def receive(host=host, stream=stream):
+            for bit in stream:
+                host.read_value[0] = bit
+                host.read(True)
+        yield "Host.read", {"payload_bytes": size, "ms_per_frame": len(stream)}, receive
+
+def bench_hub(rnd, output_dir):
+    ''' One bit sent by a host through a hub with the other ports
+    connected to hosts, and through a chain of hubs, with every wire backend '''
+    for backend in WIRE_BACKENDS:
+        # the results of the objects backend keep the params they had before the backends
+        extra = {} if backend == "objects" else {"wire_backend": backend}
+        for no_ports in HUB_PORTS:
+            network = Bench_Network(output_dir, wire_backend=backend)
+            sender = network.host("sender")
+            hub = network.hub("hub", no_ports)
+            network.connect(sender, 0, hub, 0)
+            for i in range(1, no_ports):
+                network.connect(hub, i, network.host(f"host{i}"), 0)
+            yield "Hub.resend fan-out", {"ports": no_ports, **extra}, lambda n=network, s=sender: (n.clean(), s._send("1"))
+
+        for depth in HUB_DEPTHS:
+            network = Bench_Network(output_dir, wire_backend=backend)
+            sender = network.host("sender")
+            previous, port = sender, 0
+            for i in range(depth):
+                hub = network.hub(f"hub{i}", 4)
+                network.connect(previous, port, hub, 0)
+                for j in range(2, 4):
+                    network.connect(hub, j, network.host(f"host{i}_{j}"), 0)
+                previous, port = hub, 1
+            network.connect(previous, port, network.host("receiver"), 0)
+            yield "Hub.resend chain", {"depth": depth, **extra}, lambda n=network, s=sender: (n.clean(), s._send("1"))
+
+def bench_switch(rnd, output_dir):
+    ''' Switch.send of the bits of a frame with a known destination,
+    the MAC table is full with random MACs '''
+    for table_size in MAC_TABLE_SIZES:
+        network = Bench_Network(output_dir)
+        switch = network.switch("switch", 4, table_size)
+        for i in range(4):
+            network.connect(switch, i, network.host(f"host{i}"), 0)
+        for i in range(table_size - 1):
+            switch.learn(random_mac(rnd), 1 + i % 3)
+        destination = random_mac(rnd)
+        switch.learn(destination, 2)
+        bits = [INIT_FRAME_BIT] + list(destination) + list(random_mac(rnd)) + list(bytes_bits(random_payload(rnd, 16)))
+
+        def send(network=network, switch=switch, bits=bits, destination=destination):
+            if len(switch.port_information[0]) == 0:
+                switch.port_information[0].extend(bits)
+                switch.port_mac[0] = destination
+                switch.state[0] = 2
+            network.clean()
+            switch.send()
+        yield "Switch.send", {"mac_table_size": table_size}, send
+
+BENCHMARKS = [bench_detection, bench_frame, bench_host_read, bench_hub, bench_switch]
+#endregion
+
+def memory_report(rnd, output_dir):
+    ''' Bytes per host, per switch port and per switch port with a queued
+    frame of 64 bytes, measured with tracemalloc. The loggers and events
+    of the devices are included '''
+    data = random_payload(rnd, 64)
+    bits = Frame(rnd.getrandbits(16), rnd.getrandbits(16), data, CRC16_Detection().apply_bytes(data)).to_bits()
+    network = Bench_Network(output_dir)
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        hosts = [network.host(f"memory_host{i}") for i in range(MEMORY_HOSTS)]
+        after_hosts = tracemalloc.get_traced_memory()[0]
+        switch = network.switch("memory_switch", MEMORY_SWITCH_PORTS, 1024)
+        after_switch = tracemalloc.get_traced_memory()[0]
+        for queue in switch.port_information:
+            for bit in bits:
+                queue.append(bit)
+        after_queues = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return {
+        "host": (after_hosts - start) / len(hosts),
+        "switch_port": (after_switch - after_hosts) / MEMORY_SWITCH_PORTS,
+        "switch_queued_frame": (after_queues - after_switch) / MEMORY_SWITCH_PORTS,
+        "frame_bits": len(bits),
+    }
+
+def measure(function, number, repeat):
+    ''' Return the seconds per call of each repetition '''
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - start) / number)
+    return timings
+
+def calibrate(function, min_time):
+    ''' Number of calls that take at least min_time seconds '''
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        if time.perf_counter() - start >= min_time:
+            return number
+        number *= 2
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def key(result):
+    return result["name"] + " " + json.dumps(result["params"], sort_keys=True)
+
+def run(seed, repeat, min_time, only=None, memory=False):
+    ''' Run the benchmarks whose name contains only and return the report,
+    with the memory report of the devices if memory is True '''
+    output_dir = tempfile.mkdtemp(prefix="netsim-bench-")
+    # the devices write their logs on a temporary directory, on memory as in the buffered mode
+    Logger.use_buffer(buffer_size=1 << 16, flush_interval=60.0, output_dir=output_dir)
+    results = []
+    usage = None
+    try:
+        if memory:
+            usage = memory_report(random.Random(f"{seed}-memory"), output_dir)
+            print(f"memory {json.dumps(usage)}", file=sys.stderr)
+        for bench in BENCHMARKS:
+            rnd = random.Random(f"{seed}-{bench.__name__}")
+            for name, params, function in bench(rnd, output_dir):
+                if only is not None and only not in name:
+                    continue
+                number = calibrate(function, min_time)
+                timings = measure(function, number, repeat)
+                results.append({
+                    "name": name,
+                    "params": params,
+                    "number": number,
+                    "repeat": repeat,
+                    "best": min(timings),
+                    "median": statistics.median(timings),
+                    "mean": statistics.mean(timings),
+                })
+                print(f"{name:28} {json.dumps(params):30} {min(timings) * 1e6:12.3f} us", file=sys.stderr)
+    finally:
+        Logger.close(output_dir)
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    return {
+        "seed": seed,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "unit": "seconds per call",
+        "results": results,
+        "memory": usage,
+    }
+
+def compare(report, baseline, threshold):
+    ''' Print the ratio of each benchmark against the baseline, return the
+    benchmarks that are slower than threshold times the baseline '''
+    old = {key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        previous = old.get(key(result))
+        if previous is None:
+            continue
+        ratio = result["best"] / previous["best"]
+        mark = "REGRESSION" if ratio > threshold else ""
+        print(f"{key(result):60} {ratio:8.3f} {mark}", file=sys.stderr)
+        if ratio > threshold:
+            regressions.append(key(result))
+    return regressions
+
+def compare_memory(usage, baseline, threshold):
+    ''' Print the ratio of each figure of the memory report against the
+    baseline, return the figures that are greater than threshold times
+    the baseline '''
+    regressions = []
+    for name, previous in baseline.items():
+        if name == "frame_bits" or usage.get(name) is None:
+            continue
+        ratio = usage[name] / previous
+        mark = "REGRESSION" if ratio > threshold else ""
+        print(f"{'memory ' + name:60} {ratio:8.3f} {mark}", file=sys.stderr)
+        if ratio > threshold:
+            regressions.append("memory " + name)
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Microbenchmarks of the simulator hot paths")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions of every benchmark, the best one is compared")
+    parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds of every repetition")
+    parser.add_argument("--only", default=None, help="run only the benchmarks whose name contains this text")
+    parser.add_argument("--memory", action="store_true", help="report the bytes per host and per switch port, fails if they grew over MEMORY_BASELINE")
+    parser.add_argument("--output", default=None, help="JSON file of the results, stdout by default")
+    parser.add_argument("--compare", default=None, help="JSON file of a previous run")
+    parser.add_argument("--threshold", type=float, default=1.10, help="ratio against the previous run that is a regression")
+    args = parser.parse_args()
+
+    report = run(args.seed, args.repeat, args.min_time, args.only, args.memory)
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    regressions = []
+    if args.memory:
+        regressions += compare_memory(report["memory"], MEMORY_BASELINE, MEMORY_THRESHOLD)
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions += compare(report, baseline, args.threshold)
+        if report["memory"] is not None and baseline.get("memory") is not None:
+            regressions += compare_memory(report["memory"], baseline["memory"], args.threshold)
+    if len(regressions) != 0:
+        sys.exit(1)
@@ -0,0 +1,141 @@
+''' Checkpoints of a simulation. A checkpoint is the state of the simulator
+between two ms: the simulation time, the instructions that are not
+executed yet, the devices with their wires, receive state machines,
+switch buffers and MAC tables, and the size of every log file (or of the
+event log) at that moment. It is saved with pickle, the instruction file
+is not copied, the restored stream opens it again and skips the consumed
+instructions:
+
+    python checkpoint.py ./checkpoints/checkpoint_5000.pkl --output ./output_restored
+
+The restored simulation runs until the end and its log files are the log
+files of the simulation that was saved, so a restored run writes the
+same logs as an uninterrupted run. With --script the instructions that
+remain are replaced by the ones of another file (a what-if branch) '''
+import argparse
+import os
+import pickle
+import sys
+from event_log import EVENT_LOG_FILE
+from exception import CorruptInstructionException
+from instruction_stream import Instruction_Stream
+from logger import Logger
+
+# version of the format of the checkpoints, the checkpoints of other versions are not loaded
+CHECKPOINT_VERSION = 4
+
+def log_sizes(simulator):
+    ''' Size of the log file of every logger of the devices '''
+    sizes = {}
+    for device in simulator.storage.devices:
+        for logger in device.loggers():
+            sizes[logger.name_file] = os.path.getsize(logger.path_file) if os.path.exists(logger.path_file) else 0
+    return sizes
+
+def save(simulator, path_file):
+    ''' Save the simulation on path_file, the lines of the logs that are
+    in memory are written first so the sizes of the files are the logs
+    until the current ms '''
+    buffer = Logger.buffers.get(simulator.output_dir)
+    if buffer is not None:
+        buffer.sync()
+    # with the binary format the only log file is the event log
+    event_log = Logger.event_logs.get(simulator.output_dir)
+    if event_log is not None:
+        event_log.sync()
+    state = {
+        "version": CHECKPOINT_VERSION,
+        "simulator": simulator,
+        "logs": log_sizes(simulator) if event_log is None else {EVENT_LOG_FILE: os.path.getsize(event_log.path_file)},
+        # settings of the buffered mode, None if the lines are written directly
+        "buffer": None if buffer is None else (buffer.buffer_size, buffer.flush_interval, buffer.max_open_files, buffer.queue_size),
+        # size of the batches and of the queue of the event log, None if the logs are text
+        "event_log": None if event_log is None else (event_log.batch_size, event_log.queue_size),
+    }
+    # the devices are linked by their wires, the recursion of pickle follows the links
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, 100000))
+    temp = f"{path_file}.{os.getpid()}.tmp"
+    try:
+        with open(temp, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, path_file)
+    finally:
+        sys.setrecursionlimit(limit)
+        if os.path.exists(temp):
+            os.remove(temp)
+
+def restore_logs(logs, source_dir, output_dir):
+    ''' Leave on output_dir the log files as they were when the checkpoint
+    was saved, the log files of source_dir are cut to their sizes and the
+    other log files of output_dir are removed '''
+    os.makedirs(output_dir, exist_ok=True)
+    same = os.path.abspath(source_dir) == os.path.abspath(output_dir)
+    for name in os.listdir(output_dir):
+        if (name.endswith(".txt") or name == EVENT_LOG_FILE) and name not in logs:
+            os.remove(os.path.join(output_dir, name))
+    for name, size in logs.items():
+        target = os.path.join(output_dir, name)
+        if same:
+            with open(target, "ab") as f:
+                f.truncate(size)
+            continue
+        with open(target, "wb") as f:
+            with open(os.path.join(source_dir, name), "rb") as source:
+                f.write(source.read(size))
+
+def replace_instructions(simulator, script):
+    ''' The instructions that are not executed yet are the ones of script,
+    they can not happen before the current ms '''
+    stream = Instruction_Stream(script, plan_cache=simulator.plan_cache)
+    if len(stream) != 0 and stream.peek().time < simulator.simulation_time:
+        raise CorruptInstructionException(f"The instructions of {script} start at {stream.peek().time} ms, before the checkpoint at {simulator.simulation_time} ms")
+    simulator.instructions = stream
+    simulator.schedule_next_instruction()
+
+def load(path_file, output_dir=None, script=None):
+    ''' Return the simulator saved on path_file, it writes its log files on
+    output_dir (the folder of the saved simulation if it is None). The log
+    files of output_dir are the ones of the moment of the checkpoint '''
+    with open(path_file, "rb") as f:
+        state = pickle.load(f)
+    if not isinstance(state, dict) or state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"{path_file} is not a checkpoint of version {CHECKPOINT_VERSION}")
+    simulator = state["simulator"]
+    source_dir = simulator.output_dir
+    if output_dir is None:
+        output_dir = source_dir
+
+    restore_logs(state["logs"], source_dir, output_dir)
+    if state["buffer"] is not None and output_dir not in Logger.buffers:
+        buffer_size, flush_interval, max_open_files, queue_size = state["buffer"]
+        Logger.use_buffer(buffer_size, flush_interval, max_open_files, output_dir, queue_size)
+    # the restored simulation writes a new segment of the event log
+    if state["event_log"] is not None and output_dir not in Logger.event_logs:
+        batch_size, queue_size = state["event_log"]
+        Logger.use_event_log(batch_size, output_dir, queue_size)
+    simulator.output_dir = output_dir
+    for device in simulator.storage.devices:
+        for logger in device.loggers():
+            logger.move(output_dir)
+
+    if script is not None:
+        replace_instructions(simulator, script)
+    return simulator
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Restore a checkpoint and simulate until the end")
+    parser.add_argument("checkpoint", help="checkpoint file")
+    parser.add_argument("--output", default=None, help="folder of the log files, the folder of the saved simulation by default")
+    parser.add_argument("--script", default=None, help="instruction file that replaces the instructions that remain")
+    parser.add_argument("--checkpoint-every", type=int, default=0, help="ms between two checkpoints of the restored simulation")
+    parser.add_argument("--checkpoint-dir", default="./checkpoints", help="folder of the checkpoints of the restored simulation")
+    args = parser.parse_args()
+
+    simulator = load(args.checkpoint, args.output, args.script)
+    # the checkpoints of the saved simulation are not saved again by the restored one
+    simulator.set_checkpoints(args.checkpoint_every, [], args.checkpoint_dir)
+    try:
+        simulator.run()
+    finally:
+        simulator.close()
@@ -1,25 +1,147 @@
-from strategy_detection import IStrategy_Detection
-from frame import Frame
+import sys
+from array import array
+from strategy_detection import IStrategy_Detection, np, vectorized, prefix, ranges, any_segment
 from util import mult_x
 
+def crc16_table(generator=0x8005):
+    ''' Build the table with the remainder of the division of every byte 
+    (followed by 16 zeros) by the generator x^16 + x^15 + x^2 + 1 '''
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ generator) & 0xFFFF if crc & 0x8000 else (crc << 1) & 0xFFFF
+        table.append(crc)
+    return table
+
+CRC16_TABLE = crc16_table()
+
+def crc16(data):
+    ''' Return the CRC16 of a bytes-like object (bytes, bytearray or memoryview), 
+    processing one byte at a time with the lookup table '''
+    table = CRC16_TABLE
+    crc = 0
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ table[(crc >> 8) ^ byte]
+    return crc
+
+def crc16_word_table(table=CRC16_TABLE):
+    ''' Build the table of the CRC16 of two bytes at once: the entry x is 
+    the register after receiving the 16 bits of x with an empty register, 
+    it is the byte table applied twice '''
+    words = array('H', bytes(2 * 65536))
+    for x in range(65536):
+        high = table[x >> 8]
+        words[x] = ((high << 8) & 0xFFFF) ^ table[(high >> 8) ^ (x & 0xFF)]
+    return words
+
+# built the first time that many frames are checked
+CRC16_WORD_TABLE = None
+
+def crc16_words(data):
+    ''' Return the CRC16 of a bytes-like object processing two bytes at a 
+    time, the register is 16 bits so the next word is xored with it and 
+    replaced by its entry of the word table. Same result as crc16 '''
+    global CRC16_WORD_TABLE
+    if CRC16_WORD_TABLE is None:
+        CRC16_WORD_TABLE = crc16_word_table()
+    table = CRC16_WORD_TABLE
+    even = len(data) & ~1
+    words = array('H', bytes(data[:even]))
+    if sys.byteorder == "little":
+        words.byteswap()
+    crc = 0
+    for word in words:
+        crc = table[crc ^ word]
+    if even != len(data):
+        crc = ((crc << 8) & 0xFFFF) ^ CRC16_TABLE[(crc >> 8) ^ data[-1]]
+    return crc
+
+# shortest data whose CRC16 is computed by words when the frames are few
+CRC16_WORDS_MIN_BYTES = 32
+# longest data whose CRC16 is computed by array operations, the position table has a row per byte
+CRC16_VECTOR_MAX_BYTES = 4096
+# built the first time that the CRC16 of many frames is computed by array operations
+CRC16_POSITION_TABLE = None
+
+def crc16_position_table(rows):
+    ''' Return the table (NumPy array) of the CRC16 of every byte followed 
+    by k bytes of zeros in the row k, with at least rows rows. The register 
+    starts at 0 so the CRC16 is linear: the CRC16 of data is the xor of the 
+    entries of its bytes by the number of bytes after each one '''
+    global CRC16_POSITION_TABLE
+    if CRC16_POSITION_TABLE is None or len(CRC16_POSITION_TABLE) < rows:
+        table = np.array(CRC16_TABLE, dtype=np.uint16)
+        positions = np.empty((max(rows, 256), 256), dtype=np.uint16)
+        positions[0] = table
+        for k in range(1, len(positions)):
+            # a byte of zeros more
+            previous = positions[k - 1]
+            positions[k] = ((previous << 8) & 0xFFFF) ^ table[previous >> 8]
+        CRC16_POSITION_TABLE = positions
+    return CRC16_POSITION_TABLE
+
+def crc16_segments(data, starts, ends):
+    ''' Return the CRC16 of every segment [start, end) of an uint8 array, 
+    the entries of all the bytes are taken at once from the position table 
+    and xored by segment. Same result as crc16 '''
+    lengths = ends - starts
+    table = crc16_position_table(int(lengths.max()) if len(lengths) != 0 else 0)
+    index, segment, position = ranges(starts, ends)
+    xors = prefix(table[lengths[segment] - 1 - position, data[index]], np.bitwise_xor, np.uint16)
+    first = np.cumsum(lengths) - lengths
+    return xors[first + lengths] ^ xors[first]
+
 class  CRC16_Detection(IStrategy_Detection):
     def mod2(self, data):
-        Glist = [1,1,0,0,0,0,0,0,0,0,0,0,0,0,1,0,1]
-        Wordlist =  [int(d) for d in str(bin(data))[2:]]
-        while len(Glist) <= len(Wordlist) and Wordlist:
-            if Wordlist[0] == Glist[0]:
-                del Wordlist[0]
-                for j in range(len(Glist)-1):
-                    Wordlist[j] ^= Glist[j+1]
-            while Wordlist and Wordlist[0] == 0:
-                del Wordlist[0]
-        if not Wordlist:
-            return 0
-        else:
-            CRCstring = ''.join(str(e) for e in Wordlist)
-            CRCdata = int(CRCstring,2)
-            return CRCdata
+        ''' Remainder of the division of data by the generator, data is an 
+        integer that already contains the 16 bits of zeros at the end '''
+        data >>= 16
+        return crc16(data.to_bytes((data.bit_length() + 7) // 8, "big"))
+
+    def apply_bytes(self, data):
+        ''' Bulk version of apply, receive the data as a bytes-like object 
+        and return the detection code as bytes '''
+        return bytes(data) + crc16(data).to_bytes(2, "big")
     
+    def apply_many(self, datas):
+        ''' Bulk version of apply_bytes for the data of many frames, the CRC 
+        of small batches is computed frame by frame (by words if the data is 
+        long) and the CRC of big ones by array operations '''
+        if not vectorized(datas) or max(map(len, datas)) > CRC16_VECTOR_MAX_BYTES:
+            return [bytes(data) + (crc16_words(data) if len(data) >= CRC16_WORDS_MIN_BYTES else crc16(data)).to_bytes(2, "big") for data in datas]
+        return super().apply_many(datas)
+
+    def apply_segments(self, data, starts, ends):
+        ''' The codes (data and CRC16) are written on one array that is cut 
+        by frame '''
+        crcs = crc16_segments(data, starts, ends)
+        index, segment, position = ranges(starts, ends)
+        # every code is its data followed by the 2 bytes of its CRC16
+        sizes = ends - starts + 2
+        code_ends = np.cumsum(sizes)
+        code_starts = code_ends - sizes
+        codes = np.empty(int(code_ends[-1]), dtype=np.uint8)
+        codes[code_starts[segment] + position] = data[index]
+        codes[code_ends - 2] = crcs >> 8
+        codes[code_ends - 1] = crcs & 0xFF
+        codes = codes.tobytes()
+        return [codes[start:end] for start, end in zip(code_starts.tolist(), code_ends.tolist())]
+
+    def check_segments(self, data, data_starts, data_ends, codes, code_starts, code_ends):
+        ''' The detection code is the data followed by its CRC16 '''
+        if len(data_starts) != 0 and (data_ends - data_starts).max() > CRC16_VECTOR_MAX_BYTES:
+            return super().check_segments(data, data_starts, data_ends, codes, code_starts, code_ends)
+        valid = code_ends - code_starts == data_ends - data_starts + 2
+        # only the frames with a code of that size are compared
+        sized = np.flatnonzero(valid)
+        data_starts, data_ends, code_starts, code_ends = data_starts[sized], data_ends[sized], code_starts[sized], code_ends[sized]
+        index, segment, position = ranges(data_starts, data_ends)
+        same = ~any_segment(data[index] != codes[code_starts[segment] + position], segment, len(sized))
+        crcs = (codes[code_ends - 2].astype(np.uint16) << 8) | codes[code_ends - 1]
+        valid[sized] = same & (crcs == crc16_segments(data, data_starts, data_ends))
+        return valid
+
     def apply(self, data):
         stringdata = data + "0"*16    
         dataM = int(stringdata,2)                      
@@ -27,7 +149,3 @@ class  CRC16_Detection(IStrategy_Detection):
         CRCfix = format(CRC, 'b').zfill(16)
         Tstring = mult_x(data + CRCfix, 8)
         return [mult_x(bin(len(Tstring)//8)[2:],8),Tstring]
-    
-    def check(self, frame):
-        f = Frame(frame)
-        return f.detection_code == self.apply(f.data)[1]
\ No newline at end of file
@@ -1,23 +1,43 @@
 from abc import abstractmethod, ABCMeta
-from collections import deque
+from array import array
+from collections import OrderedDict, deque
 from logger import Logger
+from event_log import RECEIVE, SEND, SEND_OK, COLLISION, DATA
 from event import EventHook
-from util import bin_hex, mult_x, INIT_FRAME_BIT, get_device_port
+from util import bin_hex, mult_x, INIT_FRAME_BIT, OUTPUT_DIR
 from ip import IP
 from payload import PayLoad
+from frame import Frame, bits_to_bytes
+from strategy_detection import VECTOR_MIN_FRAMES
 
 class Network_Component(metaclass=ABCMeta):
+    # the network components have no __dict__, the attributes of every class are declared in __slots__
+    __slots__ = ("name", "ports", "id", "links", "dirty")
+
     def __init__(self,name,no_ports):
         # name of device
         self.name=name
         # list of ports, if ports[i] = '' then this ports is not connected, else this ports is connected to ports[i]
         self.ports=['' for x in range(no_ports)]
+        # index of the component in the storage of devices
+        self.id = -1
+        # row of the topology index, links[i] is None if the port i is not connected, 
+        # else (wire_id, peer_device_id, peer_port, send_colour)
+        self.links = [None for x in range(no_ports)]
+        # components written in the current ms, shared by all the components of the storage
+        self.dirty = set()
 
     @abstractmethod
     def clean(self):
         pass
 
+    def loggers(self):
+        ''' Loggers of the log files of the component '''
+        return []
+
 class Wire(Network_Component):
+    __slots__ = ("red", "blue")
+
     def __init__(self,name,port_1,port_2):
         super().__init__(name,2)
         # port 1 that a wire connect
@@ -34,16 +54,93 @@ class Wire(Network_Component):
         self.red = None
         self.blue = None
 
+    def write(self, red, bit):
+        ''' Write a bit on the red cable if red is True, else on the blue cable '''
+        if red:
+            self.red = bit
+        else:
+            self.blue = bit
+        self.dirty.add(self)
+
+    @staticmethod
+    def channel_index(channels):
+        ''' Index of the channels (wire, send_colour) of a collision domain 
+        that the backend keeps in the domain, the wires have no index '''
+        return None
+
+    @staticmethod
+    def write_many(domain, bit):
+        ''' Write a bit on the channels (wire, send_colour) of a collision domain '''
+        for wire, red in domain.channels:
+            wire.write(red, bit)
+
+    @staticmethod
+    def first_busy(domain):
+        ''' Index of the first channel (wire, send_colour) of a collision 
+        domain that has a bit, None if all are empty '''
+        for k, (wire, red) in enumerate(domain.channels):
+            if (wire.red if red else wire.blue) is not None:
+                return k
+        return None
+
+class Array_Wire(Wire):
+    ''' Wire whose channels are a row of the Wire_Table of the simulation 
+    (wire-backend numpy), red and blue read and write the table '''
+    __slots__ = ("table", "row")
+
+    def __init__(self, name, port_1, port_2, table):
+        self.table = table
+        self.row = table.add()
+        super().__init__(name, port_1, port_2)
+
+    @property
+    def red(self):
+        return self.table.get(self.row, True)
+
+    @red.setter
+    def red(self, bit):
+        self.table.set(self.row, True, bit)
+
+    @property
+    def blue(self):
+        return self.table.get(self.row, False)
+
+    @blue.setter
+    def blue(self, bit):
+        self.table.set(self.row, False, bit)
+
+    def clean(self):
+        self.table.clean_row(self.row)
+
+    # the table cleans the rows that are written, the wires are not dirty
+    def write(self, red, bit):
+        self.table.write(self.row, red, bit)
+
+    # the index of a domain are the indexes of its channels in the table (Wire_Table.index)
+    @staticmethod
+    def channel_index(channels):
+        return channels[0][0].table.index([wire.row for wire, _ in channels], [red for _, red in channels])
+
+    @staticmethod
+    def write_many(domain, bit):
+        domain.channels[0][0].table.write_many(domain.index, bit)
+
+    @staticmethod
+    def first_busy(domain):
+        return domain.channels[0][0].table.first_busy(domain.index)
+
 class Device(Network_Component,metaclass=ABCMeta):
     ''' Abstract class that represent a device on the network'''
-    def __init__(self,name,no_ports):
+    __slots__ = ("read_value", "cable_send", "logger", "askSignalTime", "consultDevice", "consultDeviceMap", "askCountDevice", "askSimulationTime", "scheduleEvent", "bit_period", "expand_log")
+
+    def __init__(self,name,no_ports,output_dir=OUTPUT_DIR):
         super().__init__(name,no_ports)
         # values that read
         self.read_value = [None for i in range(no_ports)]
         # cable to send True=red False=blue
         self.cable_send=[False for i in range(no_ports)]
         # device's log file
-        self.logger = Logger(self.name + ".txt")
+        self.logger = Logger(self.name + ".txt", output_dir, self.name)
         # event to ask for the signal time of the simulation.
         self.askSignalTime = EventHook()
         # event to query a specific device from the device list
@@ -53,17 +150,50 @@ class Device(Network_Component,metaclass=ABCMeta):
         self.consultDeviceMap = EventHook()
         # event to know the number of devices at a given time on the network
         self.askCountDevice = EventHook()
+        # event to know the simulation time
+        self.askSimulationTime = EventHook()
+        # event to schedule a time at which the simulation must be executed
+        self.scheduleEvent = EventHook()
+        # bit-period stepping, a held bit is propagated once per signal time instead of once per ms
+        self.bit_period = False
+        # with bit-period stepping, write one log line per ms of a held bit instead of one per bit
+        self.expand_log = False
+
+    def loggers(self):
+        return [self.logger]
 
     def report_receive_ok(self, bit, port):
         ''' Report by a log message that it received a bit successfully '''
         # If the bit is None then it does not report because there was no current in the communication channel 
-        if bit == None:
+        if bit == None or not self.logger.enabled[RECEIVE]:
             return
         # the logger write the log message
-        self.logger.write(f"{port} receive {bit}")
+        self.logger.event(RECEIVE, port, bit, self.hold_time())
+
+    def hold_time(self):
+        ''' Number of ms that are written on the log for a held bit '''
+        return self.askSignalTime.fire() if self.bit_period and self.expand_log else 1
+
+    def receive_period(self):
+        ''' Number of times that a bit is received, with bit-period 
+        stepping every bit is received only once '''
+        return 1 if self.bit_period else self.askSignalTime.fire()
+
+    def release(self, footprint):
+        ''' Empty the channels (wire, send_colour) where a held bit was written '''
+        for wire, red in footprint:
+            if red:
+                wire.red = None
+            else:
+                wire.blue = None
 
     def clean(self):
         self.read_value = [None for i in range(len(self.ports))]
+
+    def set_read_value(self, port, bit):
+        ''' The device receives a bit by the port in the current ms '''
+        self.read_value[port] = bit
+        self.dirty.add(self)
         
     def xor(self, a, b):
         ''' XOR operator to apply to the channel and review if another device is sending data '''
@@ -73,14 +203,52 @@ class Device(Network_Component,metaclass=ABCMeta):
             return a
         return a^b
 
+def check_received(completed):
+    ''' Check the frames received by the hosts, completed is a list of 
+    (host, frame, line of the data log). If many hosts complete frames in 
+    the same ms, the frames of the hosts with the same detection strategy 
+    are checked at once with check_frames, then every frame is written on 
+    the data log of its host '''
+    # usually a few frames are completed in a ms, they are checked one by one
+    if len(completed) < VECTOR_MIN_FRAMES:
+        for host, frame, line in completed:
+            host.data_logger.event(DATA, value=host.detection.check_frame(frame), data=line)
+        return
+    groups = {}
+    for k, (host, _, _) in enumerate(completed):
+        groups.setdefault(type(host.detection), []).append(k)
+    valid = [True] * len(completed)
+    for indexes in groups.values():
+        strategy = completed[indexes[0]][0].detection
+        for k, ok in zip(indexes, strategy.check_frames([completed[k][1] for k in indexes])):
+            valid[k] = ok
+    for (host, _, line), ok in zip(completed, valid):
+        host.data_logger.event(DATA, value=ok, data=line)
+
+# max number of bits of a received frame without the INIT bit: the header, 255 bytes of 
+# data and 255 bytes of detection code (and a bit more if a size of the header is 0)
+MAX_FRAME_BITS = 48 + 2*8*255 + 2
+
+# number of bits of the field of each state of the receive state machine, the data and 
+# the detection code are computed when the size of data and detection are received
+HEADER_FIELDS = [0, 16, 16, 8, 8]
+
 class Host(Device, IP, PayLoad):
     ''' This class represent a Host device '''
-    def __init__(self,name, no_ports = 1):
-        Device.__init__(self,name,no_ports)
+    __slots__ = ("_assoc_ip", "payload_logger", "data_logger", "receive_bits", "footprint", "read_clock", 
+        "receiving", "receive_len", "receive_start", "receive_need", "receive_size", "receive_off", "receive_data_end", "receive_time",
+        "data_to_send", "index_sending", "time_sending", "sending_frame", "next_bit_time", "MAC", "MAC_value", "detection", "doing_ARPQ", "ARPQ_rep")
+
+    def __init__(self,name, no_ports = 1, output_dir=OUTPUT_DIR):
+        Device.__init__(self,name,no_ports,output_dir)
         IP.__init__(self)
-        PayLoad.__init__(self, name)
-        self.data_logger = Logger(self.name + "_data.txt")
-        self.check_size = lambda x, l : len(x) >= l
+        PayLoad.__init__(self, name, output_dir)
+        self.data_logger = Logger(self.name + "_data.txt", output_dir, self.name)
+        # bits of the received frame as the characters '0' and '1', it is allocated on the first frame
+        self.receive_bits = None
+        self.footprint = []
+        # first ms whose read is not applied yet, the ms without data are applied when the host reads again
+        self.read_clock = 0
         self.clean_receive()
         self.clean_sending()
         self.set_MAC("")
@@ -95,6 +263,9 @@ class Host(Device, IP, PayLoad):
             # * P = 50
             # * Q = 51
         self.ARPQ_rep = "41525051"
+
+    def loggers(self):
+        return [self.logger, self.data_logger, self.payload_logger]
         
     def construct_ARPQ_frame(self, ip):
         """
@@ -112,168 +283,191 @@ class Host(Device, IP, PayLoad):
 
     def clean_receive(self):
         self.receiving = 0
-        self.receive_MAC_1 = ""
-        self.receive_MAC_2 = ""
-        self.receive_size = ""
-        self.receive_off = ""
-        self.receive_data = ""
+        # number of bits of receive_bits that were received
+        self.receive_len = 0
+        # position of receive_bits where the field of the current state starts and its number of bits
+        self.receive_start = 0
+        self.receive_need = 0
+        # size of data and detection code of the header, and where the data ends
+        self.receive_size = 0
+        self.receive_off = 0
+        self.receive_data_end = 0
         self.receive_time = 0
-        self.receive_detect = ""
+
+    def start_receive(self):
+        ''' An INIT bit was received, the MAC of destination comes next '''
+        if self.receive_bits is None:
+            self.receive_bits = bytearray(MAX_FRAME_BITS)
+        self.receiving = 1
+        self.receive_need = HEADER_FIELDS[1]
+
+    def end_field(self, completed=None):
+        ''' The field of the current state was received, check it and go to 
+        the next state '''
+        bits = self.receive_bits
+        if self.receiving == 1:
+            mac = int(bits[0:16], 2)
+            if mac != self.MAC_value and mac != 0xFFFF:
+                self.clean_receive()
+                return
+        elif self.receiving == 3:
+            self.receive_size = int(bits[32:40], 2)
+        elif self.receiving == 4:
+            self.receive_off = int(bits[40:48], 2)
+        elif self.receiving == 5:
+            self.receive_data_end = self.receive_len
+        elif self.receiving == 6:
+            self.deliver(completed)
+            self.clean_receive()
+            return
+
+        self.transition_receive()
+        self.receive_start = self.receive_len
+        if self.receiving < 5:
+            self.receive_need = HEADER_FIELDS[self.receiving]
+        else:
+            self.receive_need = 8 * (self.receive_size if self.receiving == 5 else self.receive_off)
+
+    def deliver(self, completed=None):
+        ''' Build the received frame from the buffer as Frame.from_bits, if 
+        completed is a list the frame is appended to it to be checked with 
+        the frames of the other hosts (check_received), else it is checked 
+        and written on the data log now, it is not built if the data log 
+        does not write the frames '''
+        if not self.data_logger.enabled[DATA]:
+            return
+        bits = self.receive_bits
+        end = self.receive_len
+        data_end = min(48 + 8*self.receive_size, end)
+        frame = Frame(int(bits[0:16], 2), int(bits[16:32], 2), bits_to_bytes(bits[48:data_end]), bits_to_bytes(bits[data_end:end]))
+        received = (self, frame, f"{bin_hex(bits[16:32])} {bin_hex(bits[48:self.receive_data_end])}")
+        if completed is None:
+            check_received([received])
+        else:
+            completed.append(received)
 
     def clean_sending(self):
         self.data_to_send = ""
         self.index_sending = 0
         self.time_sending = 0
         self.sending_frame = None
+        # with bit-period stepping, time when the period of the held bit ends and channels where it is written
+        self.next_bit_time = 0
+        self.release(self.footprint)
+        self.footprint = []
 
     def report_collision(self, data):
         ''' Report collision on log file '''
-        self.logger.write(f"{self.name} send {data} collision")
+        if self.logger.enabled[COLLISION]:
+            self.logger.event(COLLISION, self.name, data)
     
     def report_send_ok(self, data):
         ''' Report success send of log file '''
-        if data == None:
+        if data == None or not self.logger.enabled[SEND_OK]:
             return
-        self.logger.write(f"{self.name}_1 send {data} ok")
+        self.logger.event(SEND_OK, f"{self.name}_1", data, self.hold_time())
 
     def send(self, data, frame=False):
-        ''' Function to send data to the network '''
+        ''' Function to send data to the network, if frame is True then 
+        data is a Frame '''
 
         if not self.data_to_send == "":
             return False
-        # data to send
-        self.data_to_send = data
+        # data to send, a frame is put on the wire as its string of bits
+        self.data_to_send = data.to_bits() if frame else data
         # index of the bit in data to send
         self.index_sending = 0
         # time sending data[index]
         self.time_sending = 0
 
-        self.sending_frame = frame
+        # frame that is sending, None if data is not a frame
+        self.sending_frame = data if frame else None
         can_send = self._send(self.data_to_send[self.index_sending])
         if not can_send:
             self.clean_sending()
+        elif self.bit_period:
+            self.schedule_next_bit()
         return can_send
 
     def _send(self, bit):
-        if self.ports[0] is "":
+        link = self.links[0]
+        if link is None:
             self.report_send_ok(bit)
             return True
-        wire = self.consultDevice.fire(self.consultDeviceMap.fire(get_device_port(self.ports[0])[0])) 
-        
-        if self.cable_send[0]:
-            wire.red = bit
-        else:
-            wire.blue = bit
+        wire_id, peer_id, peer_port, red = link
+        wire = self.consultDevice.fire(wire_id)
+        wire.write(red, bit)
 
-        wd = self.consultDevice.fire(self.consultDeviceMap.fire(get_device_port(wire.ports[1])[0] if wire.ports[0]==self.name+"_" +str(1) else get_device_port(wire.ports[0])[0]))
+        footprint = [(wire, red)]
+        wd = self.consultDevice.fire(peer_id)
         if isinstance(wd,Resender):
-            wdp = wire.name+"_"+str(2) if wire.ports[0]==self.name+"_" +str(1) else wire.name+"_"+str(1)
-            if wd.resend(bit, wdp) is "COLLISION":
+            channels = wd.propagate(bit, peer_port)
+            if channels == "COLLISION":
+                if self.bit_period:
+                    self.release(footprint)
                 self.report_collision(bit)
                 return False
-            else:
-                wd.resend(bit, wdp, True)
-                wd.read_value[wd.ports.index(wdp)] = bit
+            footprint += channels
         elif type(wd) is Host:
-            wd.read_value[0] = bit
+            wd.set_read_value(0, bit)
+        if self.bit_period:
+            self.footprint = footprint
         self.report_send_ok(bit)
         return True
 
-    def read(self, report):
-        if self.ports[0] == "":
+    def read(self, report, completed=None):
+        now = self.askSimulationTime.fire()
+        self.catch_up(now)
+        self.read_clock = now + 1
+        if self.links[0] is None:
             return
-        wire = self.consultDevice.fire(self.consultDeviceMap.fire(get_device_port(self.ports[0])[0])) 
-        #rd = wire.red if not self.cable_send[0] else wire.blue
         rd = self.read_value[0]
         if report:
-            self.report_receive_ok(rd, f"{self.name}_1")
+            if self.logger.enabled[RECEIVE]:
+                self.report_receive_ok(rd, f"{self.name}_1")
             
 
-            if self.receiving == 0 and rd == INIT_FRAME_BIT:
-                self.transition_receive()
-            elif self.receiving == 1:
-                if rd == None:
-                    return
-                elif rd == INIT_FRAME_BIT:
-                    self.clean_receive()
-                    self.receiving = 1
-                    return
-                if self.receive_time == 0:
-                    self.receive_MAC_1 += str(rd)
-                if self.check_size(self.receive_MAC_1, 16):
-                    if self.receive_MAC_1 == self.MAC or self.receive_MAC_1 == "1"*16:
-                        self.transition_receive()
-                    else:
-                        self.receiving = 0
-                        self.clean_receive()
-            elif self.receiving == 2:
-                if rd == None:
-                    return
-                elif rd == INIT_FRAME_BIT:
-                    self.clean_receive()
-                    self.receiving = 1
-                    return
-                if self.receive_time == 0:
-                    self.receive_MAC_2 += str(rd)
-                if self.check_size(self.receive_MAC_2, 16):
-                    self.transition_receive()
-            elif self.receiving == 3:
-                if rd == None:
-                    return
-                elif rd == INIT_FRAME_BIT:
-                    self.clean_receive()
-                    self.receiving = 1
-                    return
-                if self.receive_time == 0:
-                    self.receive_size += str(rd)
-                if self.check_size(self.receive_size, 8):
-                    self.transition_receive()
-            elif self.receiving == 4:
-                if rd == None:
-                    return
-                elif rd == INIT_FRAME_BIT:
-                    self.clean_receive()
-                    self.receiving = 1
-                    return
-                if self.receive_time == 0:
-                    self.receive_off += str(rd)
-                if self.check_size(self.receive_off, 8):
-                    self.transition_receive()
-            elif self.receiving == 5:
-                if rd == None:
-                    return
-                elif rd == INIT_FRAME_BIT:
-                    self.clean_receive()
-                    self.receiving = 1
-                    return
-                if self.receive_time == 0:
-                    self.receive_data += str(rd)
-                if self.check_size(self.receive_data, 8*int(self.receive_size, 2)):
-                    self.transition_receive()
-            elif self.receiving == 6:
+            if self.receiving == 0:
+                if rd == INIT_FRAME_BIT:
+                    self.start_receive()
+            else:
                 if rd == None:
                     return
                 elif rd == INIT_FRAME_BIT:
                     self.clean_receive()
-                    self.receiving = 1
+                    self.start_receive()
                     return
+                # el bit se guarda una vez por periodo
                 if self.receive_time == 0:
-                    self.receive_detect += str(rd)
-                if self.check_size(self.receive_detect, 8*int(self.receive_off,2)):
-                    detect = str()
-                    if not self.detection.check("".join([INIT_FRAME_BIT, self.receive_MAC_1, self.receive_MAC_2, self.receive_size, self.receive_off, self.receive_data, self.receive_detect])):
-                        detect += "ERROR"
-                    self.data_logger.write(f"{bin_hex(self.receive_MAC_2)} {bin_hex(self.receive_data)} {detect}")
-                    self.clean_receive()
+                    self.receive_bits[self.receive_len] = ord(rd)
+                    self.receive_len += 1
+                if self.receive_len - self.receive_start >= self.receive_need:
+                    self.end_field(completed)
 
-            if self.receive_time < self.askSignalTime.fire() - 1:
+            if self.receive_time < self.receive_period() - 1:
                 self.receive_time += 1
             else: 
                 self.receive_time = 0   
+
+    def catch_up(self, time):
+        ''' Apply the reads of the ms before time that were not read, the 
+        channel was empty in all of them '''
+        if time > self.read_clock:
+            self.skip_idle(time - self.read_clock)
+            self.read_clock = time
+
+    def skip_idle(self, ms):
+        ''' Advance the receive clock as if read had been called ms times 
+        over an empty channel '''
+        if self.links[0] is None or self.receiving != 0:
+            return
+        self.receive_time = (self.receive_time + ms) % self.receive_period()
     
     def keep_sending(self):
         ''' Keep sending a data throught network '''
         signal_time = self.askSignalTime.fire()
+        if self.bit_period:
+            return self.keep_sending_period()
  
         # if this device is sending and the sending time is less that signal time then continue spreading data
         if self.time_sending < signal_time - 1:
@@ -294,163 +488,338 @@ class Host(Device, IP, PayLoad):
                 self.time_sending = 0
                 return True
 
+    def keep_sending_period(self):
+        ''' Keep sending a data with bit-period stepping, the bit is propagated 
+        once when its period starts and stays on the wires until it ends '''
+        if self.askSimulationTime.fire() < self.next_bit_time:
+            return True
+        self.release(self.footprint)
+        self.footprint = []
+        # if send all data then spread "empty channel" status
+        if self.index_sending >= len(self.data_to_send) - 1:
+            self._send(None)
+            self.clean_sending()
+            return False
+        # else spread the next bit 
+        self.index_sending += 1
+        self._send(self.data_to_send[self.index_sending])
+        self.schedule_next_bit()
+        return True
+
+    def schedule_next_bit(self):
+        ''' Schedule the end of the period of the bit that is sending '''
+        self.next_bit_time = self.askSimulationTime.fire() + self.askSignalTime.fire()
+        self.scheduleEvent.fire(self.next_bit_time)
+
     def set_MAC(self,mac):
         self.MAC=mac
+        # MAC as integer to compare with the received ones, None if it is not a MAC of 16 bits
+        self.MAC_value = int(mac, 2) if len(mac) == 16 else None
+
+# bit of each 2-bit code of a Bit_Queue, 0 is None (empty channel), the 
+# bits on the wires are '0', '1' and INIT_FRAME_BIT as in the Wire_Table
+CODE_BITS = [None, '0', '1', INIT_FRAME_BIT]
+BIT_CODES = {bit: code for code, bit in enumerate(CODE_BITS)}
+
+class Bit_Queue:
+    ''' Queue of the bits of a port of a switch packed in a bytearray, 
+    four bits per byte (a 2-bit code per bit, the bit k is in the bits 
+    2 * (k % 4) of the byte k // 4). The bits before head were already 
+    sent, their bytes are removed when they are the half of the buffer '''
+    __slots__ = ("buffer", "head", "tail")
+
+    def __init__(self):
+        self.buffer = bytearray()
+        # index of the first bit and index after the last bit in the buffer
+        self.head = 0
+        self.tail = 0
+
+    def __len__(self):
+        return self.tail - self.head
+
+    def __getitem__(self, i):
+        k = self.head + i
+        return CODE_BITS[(self.buffer[k >> 2] >> ((k & 3) << 1)) & 3]
+
+    def append(self, bit):
+        k = self.tail
+        if k & 3 == 0:
+            self.buffer.append(BIT_CODES[bit])
+        else:
+            self.buffer[k >> 2] |= BIT_CODES[bit] << ((k & 3) << 1)
+        self.tail = k + 1
+
+    def extend(self, bits):
+        for bit in bits:
+            self.append(bit)
+
+    def popleft(self):
+        head = self.head
+        bit = CODE_BITS[(self.buffer[head >> 2] >> ((head & 3) << 1)) & 3]
+        head += 1
+        if head == self.tail:
+            self.buffer = bytearray()
+            head = self.tail = 0
+        elif head >= 256 and 2 * head >= self.tail:
+            # the bytes of the sent bits are removed, the bits keep their position in the byte
+            sent = head >> 2
+            del self.buffer[:sent]
+            head -= sent << 2
+            self.tail -= sent << 2
+        self.head = head
+        return bit
+
+    def clear(self):
+        self.buffer = bytearray()
+        self.head = 0
+        self.tail = 0
+
+    def text(self, start, end):
+        ''' String of the bits from start to end, None is written as str(None) '''
+        return ''.join(str(self[i]) for i in range(start, end))
+
+class Collision_Domain:
+    ''' Channels and devices that a bit received by a port of a resender 
+    reaches in the same ms, they only depend on the topology '''
+    __slots__ = ("channels", "writers", "twice", "receivers", "hosts", "backend", "index")
+
+    def __init__(self, channels, writers, twice, receivers, hosts):
+        # channels to write (wire, send_colour) and the hub that writes each one
+        self.channels = channels
+        self.writers = writers
+        # hub that reaches a channel twice, the traversal stops there
+        self.twice = twice
+        # resenders that receive the bit and the port by where they receive it
+        self.receivers = receivers
+        # hosts that receive the bit
+        self.hosts = hosts
+        # class of the wires, it checks and writes the channels, and the 
+        # index of the channels of its backend (None if there are no channels)
+        self.backend = type(channels[0][0]) if len(channels) != 0 else None
+        self.index = self.backend.channel_index(channels) if len(channels) != 0 else None
 
 class Resender(Device,metaclass=ABCMeta):
-    def __init__(self,name,no_ports):
-        super().__init__(name,no_ports)
+    __slots__ = ("internal_port_connection", "domains")
+
+    def __init__(self,name,no_ports,output_dir=OUTPUT_DIR):
+        super().__init__(name,no_ports,output_dir)
         self.internal_port_connection=['' for i in range(no_ports)]
+        # collision domains by (device id, port), shared by all the resenders 
+        # of the storage, the storage forgets them when a link changes
+        self.domains = {}
 
-    def resend(self,bit, port_name, write=False):
+    def resend(self, bit, port):
+        ''' Receive a bit by the port (index of the port) once the 
+        propagation of the bit was committed '''
         pass
 
+    def domain(self, port):
+        ''' Collision domain of a bit received by the port, it is computed 
+        in a single traversal the first time and kept until a link changes '''
+        domain = self.domains.get((self.id, port))
+        if domain is not None:
+            return domain
+        channels = []
+        writers = []
+        used = set()
+        twice = None
+        receivers = []
+        hosts = []
+
+        pending = [(self, port)]
+        while len(pending) != 0 and twice is None:
+            device, from_port = pending.pop()
+            receivers.append((device, from_port))
+            # only the hubs resend the bit in the same ms, a switch stores it
+            if not isinstance(device, Hub):
+                continue
+            for i in range(len(device.links)):
+                link = device.links[i]
+                if link is None or i == from_port:
+                    continue
+                wire_id, peer_id, peer_port, red = link
+                if (wire_id, red) in used:
+                    twice = device
+                    break
+                used.add((wire_id, red))
+                channels.append((device.consultDevice.fire(wire_id), red))
+                writers.append(device)
+
+                wd = device.consultDevice.fire(peer_id)
+                if isinstance(wd, Resender):
+                    pending.append((wd, peer_port))
+                elif type(wd) is Host:
+                    hosts.append(wd)
+
+        domain = Collision_Domain(channels, writers, twice, receivers, hosts)
+        self.domains[(self.id, port)] = domain
+        return domain
+
+    def propagate(self, bit, port):
+        ''' Propagate a bit received by the port through the collision 
+        domain. If any channel of the domain is busy (or is reached twice) 
+        then returns "COLLISION" and nothing is written, else writes all of 
+        them, the receivers get the bit and returns the list of channels 
+        written '''
+        domain = self.domain(port)
+        # the busy channels of the domain are checked at once, the first 
+        # busy channel (or the channel reached twice) reports the collision
+        busy = domain.backend.first_busy(domain) if domain.backend is not None else None
+        if busy is not None:
+            domain.writers[busy].report_collision()
+            return "COLLISION"
+        if domain.twice is not None:
+            domain.twice.report_collision()
+            return "COLLISION"
+
+        # commit
+        if domain.backend is not None:
+            domain.backend.write_many(domain, bit)
+        for device, from_port in domain.receivers:
+            device.resend(bit, from_port)
+            device.set_read_value(from_port, bit)
+        for host in domain.hosts:
+            host.set_read_value(0, bit)
+        return domain.channels
+
 class Hub(Resender):
     ''' This class represent a Hub device '''
-    def __init__(self,name,no_ports):
-        super().__init__(name,no_ports)
+    __slots__ = ()
+
+    def __init__(self,name,no_ports,output_dir=OUTPUT_DIR):
+        super().__init__(name,no_ports,output_dir)
     
     def report_resend(self, bit, port):
         ''' This function reports in the log messages the forwarding of data through all ports '''
-        if bit == None:
+        if bit == None or not self.logger.enabled[SEND]:
             return
         name_ports = [self.name + "_" + str(i + 1) for i in range(len(self.ports))]
         name_ports.remove(port)
         for i in name_ports:
-            self.logger.write(f"{i} send {bit}")
+            self.logger.event(SEND, i, bit, self.hold_time())
     
     def report_collision(self):
         pass
 
-    def resend(self, bit, port_name, write=False):
-        if write:
-            self.read_value[self.ports.index(port_name)] = bit
-        # lista de puertos por donde reenvio
-        list_port = []
-
+    def resend(self, bit, port):
         # puerto del hub por donde recibio la info
-        from_value = self.name + "_" + str(self.ports.index(port_name) + 1)
-
-        # si hay que escribir el valor en el txt
-        if write:
-            self.report_receive_ok(bit,from_value )
-
-        # por cada puerto reenvia
-        for i in range(len(self.ports)):
-            # toma el valor del puerto (esto es el puerto de un cable que esta conectado a ti)
-            port = self.ports[i]
-
-            # si el puerto es vacio o el puerto es por el mismo que recibes
-            if port == "" or port == port_name:
-                continue
-
-
-            # dame el cable que esta conectado en el puerto
-            wire = self.consultDevice.fire(self.consultDeviceMap.fire(get_device_port(port)[0]))
-
-            # si envias por el rojo
-            if self.cable_send[i]:
-                # si el rojo no esta vacio entonces hay colision
-                if not wire.red is None:
-                    self.report_collision()
-                    return "COLLISION"
-                # si hay que escribir entonces pon el valor en el cable rojo
-                if write:
-                    wire.red = bit 
-            else:
-                # revisa si hay colision en el azul
-                if not wire.blue is None:
-                    self.report_collision()
-                    return "COLLISION"
-                # si hay que escribir entonces pon el valor en el cable azul
-                if write:
-                    wire.blue = bit 
-                
-
-            # agrega este indice a la lista
-            list_port.append(i)
-            
-            # dispositivo con el que esta conectado a traves del cable
-            wd = self.consultDevice.fire(self.consultDeviceMap.fire(get_device_port(wire.ports[1])[0] if wire.ports[0]==self.name+"_"+str(i+1)  else get_device_port(wire.ports[0])[0]))
-            # si el dispositivo es un resender entonces dile que reenvie
-            if isinstance(wd, Resender):
-                # dame el puerto del cable que esta conectado al Resender
-                wdp =wire.name+"_"+str(2) if wire.ports[0]==self.name+"_" +str(i+1) else wire.name+"_"+str(1)
-                # revisa si el resender da colision
-                if wd.resend(bit, wdp) is "COLLISION":
-                    self.report_collision()
-                    return "COLLISION"
-                else:
-                    # si no hubo colision entonces pon el valor
-                    wd.resend(bit, wdp, True)
-                    wd.read_value[wd.ports.index(wdp)] = bit
-            elif type(wd) is Host:
-                wd.read_value[0] = bit
-        # reporta que renviaste si tienes que escribir
-        if write:
-            self.report_resend(bit, from_value)
-        return list_port
+        from_value = self.name + "_" + str(port + 1)
+        self.report_receive_ok(bit, from_value)
+        # los cables de los demas puertos ya tienen el valor
+        self.report_resend(bit, from_value)
 
 class Switch(Resender):
-    def __init__(self,name,no_ports):
-        super().__init__(name,no_ports)
-        # tablas de las MAC
-        self.macs=[set(['1111111111111111']) for i in range(no_ports)]
+    __slots__ = ("macs", "aging_time", "max_macs", "holding", "footprint", "port_information", "complete_mac", "state", "port_mac", "port_origin", "time_sending", "time_receiving")
+
+    def __init__(self,name,no_ports, aging_time=300000, max_macs=1024, output_dir=OUTPUT_DIR):
+        super().__init__(name,no_ports,output_dir)
+        # tabla de las MAC, mac -> (puerto, tiempo en que se aprendio), la menos usada recientemente es la primera
+        self.macs=OrderedDict()
+        # tiempo en ms que una MAC se mantiene en la tabla
+        self.aging_time = aging_time
+        # cantidad maxima de MAC en la tabla
+        self.max_macs = max_macs
+        # con bit-period stepping, si el bit del frente de la cola de cada puerto se esta enviando
+        self.holding = array('b', [False] * no_ports)
+        # con bit-period stepping, canales donde esta escrito el bit que se envia de cada puerto
+        self.footprint = [[] for i in range(no_ports)]
         # cola de bits por cada puerto para enviar
-        self.port_information=[deque() for i in range(no_ports)]
+        self.port_information=[Bit_Queue() for i in range(no_ports)]
         # esta la mac de destino completa
-        self.complete_mac=[False for i in range(no_ports)]
+        self.complete_mac=array('b', [False] * no_ports)
         # estados de la maquina de estados por puertos
-        self.state=[0 for i in range(no_ports)]
+        self.state=array('b', [0] * no_ports)
         # mac de destino por cada puerto
         self.port_mac=['' for i in range(no_ports)]
         # mac de origen por cada puerto
         self.port_origin=['' for i in range(no_ports)]
         # time sending info must be minor than signal time
-        self.time_sending = [0] * no_ports
-        self.time_receiving = [0] * no_ports
+        self.time_sending = array('q', [0] * no_ports)
+        self.time_receiving = array('q', [0] * no_ports)
     
     def clean_port(self, i):
         self.time_sending[i] = self.askSignalTime.fire()
         self.time_receiving[i] = 0
         self.state[i] = 0
-        self.port_information[i] = deque()
+        self.port_information[i].clear()
         self.complete_mac[i] = False
         self.port_mac[i] = ""
         self.port_origin[i] = ""
+        self.holding[i] = False
+        self.release(self.footprint[i])
+        self.footprint[i] = []
+        # las MAC aprendidas por el puerto ya no son validas
+        for mac in [mac for mac, (port, _) in self.macs.items() if port == i]:
+            del self.macs[mac]
+
+    def learn(self, mac, port):
+        ''' Learn that the mac is connected to the port, if the table is full 
+        then the least recently used mac is removed '''
+        self.macs[mac] = (port, self.askSimulationTime.fire())
+        self.macs.move_to_end(mac)
+        if len(self.macs) > self.max_macs:
+            self.macs.popitem(last=False)
+
+    def lookup(self, mac):
+        ''' Return the port where the mac is connected, None if the mac is 
+        unknown (or broadcast), its entry is older than the aging time or 
+        its port is not connected '''
+        entry = self.macs.get(mac)
+        if entry is None:
+            return None
+        port, time = entry
+        if self.askSimulationTime.fire() - time > self.aging_time or self.links[port] is None:
+            del self.macs[mac]
+            return None
+        self.macs.move_to_end(mac)
+        return port
         
     def refresh_time(self):
         st = self.askSignalTime.fire()
-        self.time_sending = [st] * len(self.ports)
-
-    def resend(self, bit, port_name, write=False):
-        if write:
-            # puerto del switch por donde recibio la info
-            index_from = self.ports.index(port_name)
-            from_value = self.name + "_" + str(index_from + 1)
-
-            self.report_receive_ok(bit,from_value)
-
-            if self.time_receiving[index_from] == self.askSignalTime.fire():
-                self.time_receiving[index_from] = 0
-            if self.time_receiving[index_from] == 0:
-                self.port_information[index_from].append(bit)
-            if self.time_receiving[index_from] <= self.askSignalTime.fire() -1:
-                self.time_receiving[index_from] += 1
-            
+        self.time_sending = array('q', [st] * len(self.ports))
 
-            if bit == INIT_FRAME_BIT:
-                self.state[index_from]=1
-            if len(self.port_information[index_from])==17 and self.state[index_from]==1:
-                self.state[index_from]=2
-                self.port_mac[index_from]=''.join(map(lambda x: str(x), [self.port_information[index_from][i] for i in range(1, len(self.port_information[index_from]))]))
-            elif self.state[index_from]==2 and len(self.port_origin[index_from])<16:
-                self.port_origin[index_from]+=bit
-            
+    def has_data(self):
+        ''' If some port has bits to send '''
+        for queue in self.port_information:
+            if len(queue) != 0:
+                return True
+        return False
+
+    def resend(self, bit, port):
+        # puerto del switch por donde recibio la info
+        index_from = port
+        from_value = self.name + "_" + str(index_from + 1)
+
+        self.report_receive_ok(bit,from_value)
+
+        period = self.receive_period()
+        # el bit se guarda solo la primera vez que se recibe en su periodo
+        new_bit = False
+        if self.time_receiving[index_from] == period:
+            self.time_receiving[index_from] = 0
+        if self.time_receiving[index_from] == 0:
+            self.port_information[index_from].append(bit)
+            new_bit = True
+            # con bit-period stepping el bit puede enviarse en el proximo ms
+            if self.bit_period and not self.holding[index_from]:
+                self.scheduleEvent.fire(self.askSimulationTime.fire() + 1)
+        if self.time_receiving[index_from] <= period -1:
+            self.time_receiving[index_from] += 1
+        
+
+        if bit == INIT_FRAME_BIT:
+            self.state[index_from]=1
+        if len(self.port_information[index_from])==17 and self.state[index_from]==1:
+            self.state[index_from]=2
+            self.port_mac[index_from]=self.port_information[index_from].text(1, len(self.port_information[index_from]))
+        elif self.state[index_from]==2 and new_bit and len(self.port_origin[index_from])<16:
+            self.port_origin[index_from]+=bit
             if len(self.port_origin[index_from])==16:
-                self.macs[index_from].add(self.port_origin[index_from])
+                self.learn(self.port_origin[index_from], index_from)
 
     def send(self):
+        if self.bit_period:
+            return self.send_period()
         for i in range(len(self.ports)):
             if len(self.port_information[i]) == 0:
                 self.port_origin[i] = ""
@@ -460,45 +829,7 @@ class Switch(Resender):
 
             elif self.state[i]==1:
                 continue
-            empty = 0
-            sent = False
-            find=False
-            for j in range(len(self.ports)):
-                if self.port_mac[i] in self.macs[j]:
-                    find=True
-                    wire = self.consultDevice.fire(self.consultDeviceMap.fire(get_device_port(self.ports[j])[0]))
-                    if wire is None:
-                        self.macs[j].remove(self.port_mac[i])
-                        continue
-                    if self.cable_send[j]:
-                        if wire.red is None:
-                            wire.red= self.port_information[i][0]
-                            sent = True
-                    else:
-                        if wire.blue is None:
-                            wire.blue= self.port_information[i][0]
-                            sent = True
-                    if sent:
-                        self.resend_bit(wire, i, j)
-                    
-            if not find:
-                for j in range(len(self.ports)):
-                    if self.ports[j] == "" or i == j:
-                        empty += 1
-                        continue
-                    wire = self.consultDevice.fire(self.consultDeviceMap.fire(get_device_port(self.ports[j])[0]))
-                    if wire is None:
-                        continue
-                    if self.cable_send[j]:
-                        if wire.red is None:
-                            wire.red=self.port_information[i][0]
-                            sent = True
-                    else:
-                        if wire.blue is None:
-                            wire.blue=self.port_information[i][0]   
-                            sent = True
-                    if sent:
-                        self.resend_bit(wire, i, j)
+            sent, empty, _ = self.forward(i)
 
             if sent or empty == len(self.ports):
                 self.time_sending[i] -= 1
@@ -506,33 +837,305 @@ class Switch(Resender):
                 self.port_information[i].popleft()
                 self.time_sending[i] = self.askSignalTime.fire()
 
-    def resend_bit(self, wire, i , j):
+    def send_period(self):
+        ''' Send with bit-period stepping, the bit at the front of each queue is 
+        sent once when its period starts and stays on the wires until it ends, 
+        time_sending[i] is the time when the period of the bit of port i ends '''
+        now = self.askSimulationTime.fire()
+        for i in range(len(self.ports)):
+            if self.holding[i]:
+                if now < self.time_sending[i]:
+                    continue
+                # termino el periodo del bit que se estaba enviando
+                self.release(self.footprint[i])
+                self.footprint[i] = []
+                self.holding[i] = False
+                self.port_information[i].popleft()
+
+            if len(self.port_information[i]) == 0:
+                self.port_origin[i] = ""
+                self.port_mac[i] = ""
+                self.state[i]=0
+                continue
+
+            elif self.state[i]==1:
+                continue
+            sent, empty, footprint = self.forward(i)
+
+            if sent or empty == len(self.ports):
+                self.holding[i] = True
+                self.footprint[i] = footprint
+                self.time_sending[i] = now + self.askSignalTime.fire()
+                self.scheduleEvent.fire(self.time_sending[i])
+            else:
+                # no se pudo enviar, se intenta en el proximo ms
+                self.scheduleEvent.fire(now + 1)
+
+    def forward(self, i):
+        ''' Send the bit at the front of the queue of port i to the port of its 
+        destination MAC, or to all the ports if it is unknown. Returns if the 
+        bit was sent, the number of ports that are empty (or are port i) and 
+        the channels (wire, send_colour) where the bit was written '''
+        empty = 0
+        sent = False
+        footprint = []
+        bit = self.port_information[i][0]
+        # puerto donde esta la MAC de destino, si no se conoce se envia por todos los puertos
+        j = self.lookup(self.port_mac[i])
+        if j is not None:
+            wire = self.consultDevice.fire(self.links[j][0])
+            if (wire.red if self.links[j][3] else wire.blue) is None:
+                wire.write(self.links[j][3], bit)
+                sent = True
+            if sent:
+                footprint.append((wire, self.links[j][3]))
+                self.resend_bit(wire, i, j, footprint)
+        else:
+            for j in range(len(self.ports)):
+                link = self.links[j]
+                if link is None or i == j:
+                    empty += 1
+                    continue
+                wire = self.consultDevice.fire(link[0])
+                if (wire.red if link[3] else wire.blue) is None:
+                    wire.write(link[3], bit)
+                    sent = True
+                    footprint.append((wire, link[3]))
+                if sent:
+                    self.resend_bit(wire, i, j, footprint)
+        return sent, empty, footprint
+
+    def resend_bit(self, wire, i , j, footprint=None):
         bit = self.port_information[i][0]
-        wd = self.consultDevice.fire(self.consultDeviceMap.fire(get_device_port(wire.ports[1])[0] if wire.ports[0]==self.name+"_"+str(j+1)  else get_device_port(wire.ports[0])[0]))
+        _, peer_id, peer_port, _ = self.links[j]
+        wd = self.consultDevice.fire(peer_id)
         # si el dispositivo es un resender entonces dile que reenvie
         if isinstance(wd, Resender):
-            # dame el puerto del cable que esta conectado al Resender
-            wdp =wire.name+"_"+str(2) if wire.ports[0]==self.name+"_" +str(j+1) else wire.name+"_"+str(1)
-            # revisa si el resender da colision
-            if wd.resend(bit, wdp) is "COLLISION":
-                self.report_collision()
-                return "COLLISION" 
-            else:
-                # si no hubo colision entonces pon el valor
-                wd.resend(bit, wdp, True)
-                wd.read_value[wd.ports.index(wdp)] = bit
+            channels = wd.propagate(bit, peer_port)
+            if channels != "COLLISION" and footprint is not None:
+                footprint += channels
+            return channels
         elif type(wd) is Host:
-            wd.read_value[0] = bit
+            wd.set_read_value(0, bit)
 
     def can_send(self, i):
         for j in range(len(self.ports)):
-            if self.ports[j] == "" or i == j:
+            link = self.links[j]
+            if link is None or i == j:
                 continue
-            wire = self.consultDevice.fire(self.consultDeviceMap.fire(get_device_port(self.ports[j])[0]))
-            if self.cable_send[j]:
+            wire = self.consultDevice.fire(link[0])
+            if link[3]:
                 if not wire.red is None:
                     return False
             else:
                 if not wire.blue is None:
                     return False
-        return True
\ No newline at end of file
+        return True
+
+class Switch_Frame:
+    ''' Frame that a port of a Buffered_Switch receives. The bits after the 
+    INIT bit are stored as the bytes of the frame (8 bits per byte, the 
+    first bit is the most significant): the MACs of destination and origin 
+    and the sizes are its first 6 bytes. When the sizes are received (bit 
+    49) the bytearray grows to the size of the frame. The frame is aborted 
+    if its port receives other INIT, is disconnected or stops to receive 
+    bits before the frame is complete '''
+    __slots__ = ("data", "received", "size", "aborted", "last")
+
+    def __init__(self):
+        self.data = bytearray()
+        # bits recibidos contando el bit INIT
+        self.received = 1
+        # tamaño en bits contando el bit INIT, se conoce con el bit 49
+        self.size = None
+        self.aborted = False
+        # ms en que se guardo el ultimo bit
+        self.last = 0
+
+    def append(self, bit):
+        k = self.received - 1
+        if k >> 3 == len(self.data):
+            self.data.append(0)
+        if bit == '1':
+            self.data[k >> 3] |= 0x80 >> (k & 7)
+        self.received += 1
+        if self.received == 49:
+            self.size = 49 + 8 * (self.data[4] + self.data[5])
+            self.data.extend(bytes(self.data[4] + self.data[5]))
+
+    def bit(self, k):
+        ''' Bit k of the frame, the bit 0 is INIT '''
+        if k == 0:
+            return INIT_FRAME_BIT
+        k -= 1
+        return '1' if self.data[k >> 3] & (0x80 >> (k & 7)) else '0'
+
+    def mac(self, start):
+        ''' MAC of the header that starts in the byte start, as bits '''
+        return format((self.data[start] << 8) | self.data[start + 1], '016b')
+
+    def complete(self):
+        return self.size is not None and self.received >= self.size
+
+class Buffered_Switch(Switch):
+    ''' Switch with a buffer per frame (config "switch-buffers" "frame"). 
+    Every port stores the frame that it receives, when the INIT bit and 
+    the MACs of the header are received the switch learns the MAC of 
+    origin, looks up the MAC of destination once and adds the frame to the 
+    queue of the port of the destination (of every port if it is unknown). 
+    Every port sends the frames of its queue one after the other, a frame 
+    starts to be sent while it is received (cut-through) and does not 
+    wait for the frames of other ports '''
+    __slots__ = ("ingress", "egress", "position")
+
+    def __init__(self, name, no_ports, aging_time=300000, max_macs=1024, output_dir=OUTPUT_DIR):
+        super().__init__(name, no_ports, aging_time, max_macs, output_dir)
+        # frame que recibe cada puerto, None si no esta recibiendo
+        self.ingress = [None for i in range(no_ports)]
+        # cola de frames por enviar de cada puerto
+        self.egress = [deque() for i in range(no_ports)]
+        # indice del bit que envia cada puerto del primer frame de su cola
+        self.position = array('q', [0] * no_ports)
+
+    def clean_port(self, i):
+        super().clean_port(i)
+        if self.ingress[i] is not None:
+            self.ingress[i].aborted = True
+            self.ingress[i] = None
+        self.egress[i].clear()
+        self.position[i] = 0
+
+    def has_data(self):
+        for queue in self.egress:
+            if len(queue) != 0:
+                return True
+        return False
+
+    def resend(self, bit, port):
+        self.report_receive_ok(bit, self.name + "_" + str(port + 1))
+
+        period = self.receive_period()
+        # el bit se guarda solo la primera vez que se recibe en su periodo, 
+        # como en Host el periodo empieza en el primer ms del bit INIT
+        frame = self.ingress[port]
+        if self.time_receiving[port] == period or (bit == INIT_FRAME_BIT and (frame is None or frame.received != 1)):
+            self.time_receiving[port] = 0
+        if self.time_receiving[port] == 0:
+            self.store(bit, port)
+        if self.time_receiving[port] <= period - 1:
+            self.time_receiving[port] += 1
+
+    def store(self, bit, port):
+        ''' Store a bit in the frame that the port receives, the bits out 
+        of a frame are discarded '''
+        if bit == INIT_FRAME_BIT:
+            if self.ingress[port] is not None:
+                self.ingress[port].aborted = True
+            self.ingress[port] = Switch_Frame()
+        frame = self.ingress[port]
+        if frame is None or frame.aborted or bit is None:
+            return
+        if bit != INIT_FRAME_BIT:
+            frame.append(bit)
+        frame.last = self.askSimulationTime.fire()
+        # INIT y las MAC de destino y origen
+        if frame.received == 33:
+            self.route(frame, port)
+        if frame.complete():
+            self.ingress[port] = None
+        # con bit-period stepping el bit puede enviarse en el proximo ms
+        if self.bit_period:
+            self.scheduleEvent.fire(self.askSimulationTime.fire() + 1)
+
+    def route(self, frame, port):
+        ''' Learn the MAC of origin of the frame and add it to the queues of 
+        the ports of its destination, it is not sent by the port where it 
+        arrives '''
+        self.learn(frame.mac(2), port)
+        j = self.lookup(frame.mac(0))
+        if j is not None:
+            if j != port:
+                self.egress[j].append(frame)
+            return
+        for j in range(len(self.ports)):
+            if self.links[j] is not None and j != port:
+                self.egress[j].append(frame)
+
+    def next_bit(self, j):
+        ''' Bit of the frame that port j sends, None if the port has not a 
+        bit to send. The aborted frames are removed from the queue when the 
+        port sent all their received bits '''
+        queue = self.egress[j]
+        while len(queue) != 0:
+            frame = queue[0]
+            if self.position[j] < frame.received:
+                return frame.bit(self.position[j])
+            # the port where the frame arrives receives a bit every signal time, 
+            # a frame cut before (the switch before lost its port) is aborted
+            if not frame.aborted and self.askSimulationTime.fire() - frame.last <= self.askSignalTime.fire():
+                # el bit aun no llega
+                if self.bit_period:
+                    self.scheduleEvent.fire(self.askSimulationTime.fire() + 1)
+                return None
+            frame.aborted = True
+            queue.popleft()
+            self.position[j] = 0
+        return None
+
+    def sent_bit(self, j):
+        ''' The port j ended to send a bit, the frame is removed from the 
+        queue after its last bit '''
+        self.position[j] += 1
+        frame = self.egress[j][0]
+        if frame.complete() and self.position[j] >= frame.size:
+            self.egress[j].popleft()
+            self.position[j] = 0
+
+    def send(self):
+        if self.bit_period:
+            return self.send_period()
+        for j in range(len(self.ports)):
+            bit = self.next_bit(j)
+            if bit is None:
+                continue
+            self.write_bit(j, bit)
+            self.time_sending[j] -= 1
+            if self.time_sending[j] == 0:
+                self.sent_bit(j)
+                self.time_sending[j] = self.askSignalTime.fire()
+
+    def send_period(self):
+        ''' Send with bit-period stepping as Switch.send_period, every bit 
+        stays on the wire of the port during its period '''
+        now = self.askSimulationTime.fire()
+        for j in range(len(self.ports)):
+            if self.holding[j]:
+                if now < self.time_sending[j]:
+                    continue
+                self.release(self.footprint[j])
+                self.footprint[j] = []
+                self.holding[j] = False
+                self.sent_bit(j)
+            bit = self.next_bit(j)
+            if bit is None:
+                continue
+            self.footprint[j] = self.write_bit(j, bit)
+            self.holding[j] = True
+            self.time_sending[j] = now + self.askSignalTime.fire()
+            self.scheduleEvent.fire(self.time_sending[j])
+
+    def write_bit(self, j, bit):
+        ''' Write the bit on the wire of port j and give it to the device 
+        at the other side, return the channels (wire, send_colour) written '''
+        wire_id, peer_id, peer_port, red = self.links[j]
+        wire = self.consultDevice.fire(wire_id)
+        wire.write(red, bit)
+        footprint = [(wire, red)]
+        wd = self.consultDevice.fire(peer_id)
+        if isinstance(wd, Resender):
+            channels = wd.propagate(bit, peer_port)
+            if channels != "COLLISION":
+                footprint += channels
+        elif type(wd) is Host:
+            wd.set_read_value(0, bit)
+        return footprint
@@ -1,5 +1,7 @@
 class EventHook(object):
     ''' Represent an event hook '''
+    __slots__ = ("__handlers",)
+
     def __init__(self):
         self.__handlers = []
 
@@ -0,0 +1,294 @@
+''' Binary event log, the output of the simulations with "log-format"
+"binary". All the devices of an output folder write their events on one
+file (events.bin) instead of a text file per log, an event is a record of
+fixed width fields (time, log file, port, kind, value, repeat and data)
+and the names (log files, ports, received data) are written once in a
+string table:
+
+    python event_log.py ./output/events.bin --text ./output_text
+
+writes the text log files that the simulation writes with "log-format"
+"text", and read_arrays returns the records as NumPy arrays.
+
+The file is a list of segments, a segment is a header followed by blocks,
+a block is its kind, the number of items and the items. A STRINGS block
+adds strings to the string table of the segment (the id of a string is
+its index in the table). A RECORDS block has a batch of records by
+columns: the first time of the batch, the width in bytes of every column
+and the columns, each one is an array of unsigned integers of the
+smallest width of its values (the times are stored from the first time).
+A string field is the id of the string plus one, 0 if the record has not
+that field. Every segment has its own string table, so appending a log to
+another one (the logs of the parallel components, a restored checkpoint)
+is a valid log '''
+import argparse
+import os
+import struct
+import sys
+from array import array
+try:
+    import numpy as np
+except ImportError:
+    np = None
+from exception import MissingDependencyException
+from log_writer import Log_Writer
+
+EVENT_LOG_FILE = "events.bin"
+EVENT_LOG_MAGIC = b"NSEVLOG1"
+# kind and number of items of a block
+BLOCK = struct.Struct("<BI")
+STRINGS, RECORDS = 0, 1
+STRING_SIZE = struct.Struct("<I")
+# columns of a block of records
+COLUMNS = ["time", "file", "port", "kind", "value", "repeat", "data"]
+# first time of a block of records and width of every column
+COLUMNS_HEADER = struct.Struct("<q" + "B" * len(COLUMNS))
+# typecode of array of every width of a column
+WIDTHS = {1: "B", 2: "H", 4: "I", 8: "Q"}
+# value of a record without value
+NO_VALUE = 0xFF
+
+# kinds of events, OPEN is the creation of a log file
+OPEN, RECEIVE, SEND, SEND_OK, COLLISION, DATA = range(6)
+KIND_NAMES = ["open", "receive", "send", "send ok", "collision", "data"]
+
+def format_event(kind, port, value, data):
+    ''' Line of the text log of an event without its time '''
+    if kind == RECEIVE:
+        return f"{port} receive {value}"
+    if kind == SEND:
+        return f"{port} send {value}"
+    if kind == SEND_OK:
+        return f"{port} send {value} ok"
+    if kind == COLLISION:
+        return f"{port} send {value} collision"
+    # the value of a received frame is if it has no errors
+    return f"{data} {'' if value else 'ERROR'}"
+
+def width(column):
+    ''' Smallest width in bytes of the values of the column '''
+    top = max(column, default=0)
+    for size in WIDTHS:
+        if top < 1 << (8 * size):
+            return size
+    raise OverflowError(f"Value {top} of the event log does not fit in 8 bytes")
+
+def to_bytes(column, size):
+    ''' Little endian bytes of the column with values of size bytes '''
+    packed = array(WIDTHS[size], column)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+def from_bytes(data, size):
+    column = array(WIDTHS[size])
+    column.frombytes(data)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+class Event_Log:
+    ''' Writer of the events of an output folder, the records are batched
+    in memory by columns and written with the new strings when batch_size
+    records are waiting or when the log is flushed. If queue_size is not 0
+    the batches are written by a Log_Writer thread '''
+    def __init__(self, path_file, batch_size=65536, queue_size=0):
+        self.path_file = path_file
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        # thread that writes the batches, None if they are written by the simulation
+        self.writer = Log_Writer(queue_size) if queue_size != 0 else None
+        # id of every string of the segment, strings not written yet
+        self.ids = {}
+        self.new_strings = []
+        # columns of the records not written yet
+        self.columns = [[] for _ in COLUMNS]
+        self.file = open(path_file, "ab")
+        self.file.write(EVENT_LOG_MAGIC)
+        self.file.flush()
+
+    def string(self, text):
+        ''' Id of a string plus one, 0 if it is None '''
+        if text is None:
+            return 0
+        _id = self.ids.get(text)
+        if _id is None:
+            _id = self.ids[text] = len(self.ids) + 1
+            self.new_strings.append(text)
+        return _id
+
+    def record(self, time, name_file, kind, port=None, value=None, repeat=1, data=None):
+        time_column, file_column, port_column, kind_column, value_column, repeat_column, data_column = self.columns
+        time_column.append(time)
+        file_column.append(self.string(name_file))
+        port_column.append(self.string(port))
+        kind_column.append(kind)
+        value_column.append(NO_VALUE if value is None else int(value))
+        repeat_column.append(repeat)
+        data_column.append(self.string(data))
+        if len(time_column) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        ''' Write the strings and records in memory, with a writer thread
+        they are written after the flush returns '''
+        if len(self.new_strings) == 0 and len(self.columns[0]) == 0:
+            return
+        if self.writer is None:
+            self.write_batch(self.new_strings, self.columns)
+        else:
+            self.writer.submit(self.write_batch, self.new_strings, self.columns)
+        self.new_strings = []
+        self.columns = [[] for _ in COLUMNS]
+
+    def write_batch(self, strings, columns):
+        ''' Write the blocks of a batch, the strings first so a reader
+        knows every string of the records '''
+        if len(strings) != 0:
+            self.file.write(BLOCK.pack(STRINGS, len(strings)))
+            for text in strings:
+                encoded = text.encode()
+                self.file.write(STRING_SIZE.pack(len(encoded)))
+                self.file.write(encoded)
+        count = len(columns[0])
+        if count != 0:
+            base = min(columns[0])
+            columns = [[time - base for time in columns[0]]] + columns[1:]
+            sizes = [width(column) for column in columns]
+            self.file.write(BLOCK.pack(RECORDS, count))
+            self.file.write(COLUMNS_HEADER.pack(base, *sizes))
+            for column, size in zip(columns, sizes):
+                self.file.write(to_bytes(column, size))
+        self.file.flush()
+
+    def sync(self):
+        ''' Write the events in memory and wait until they are written '''
+        self.flush()
+        if self.writer is not None:
+            self.writer.wait()
+
+    def close(self):
+        ''' Write the events in memory and close the file, the writer
+        thread ends when every batch is written '''
+        self.flush()
+        if self.writer is None:
+            self.file.close()
+        else:
+            self.writer.submit(self.file.close)
+            self.writer.close()
+
+def read_blocks(path_file):
+    ''' Generator of (strings, base, columns) of every block of records of
+    the file, strings is the string table of the segment (it grows while
+    the segment is read), base is the first time of the block and columns
+    are the (width, bytes) of every column '''
+    with open(path_file, "rb") as f:
+        strings = None
+        while True:
+            kind = f.read(1)
+            if len(kind) == 0:
+                return
+            # the first byte of a header is not the kind of a block
+            if kind == EVENT_LOG_MAGIC[:1]:
+                if kind + f.read(len(EVENT_LOG_MAGIC) - 1) != EVENT_LOG_MAGIC:
+                    raise ValueError(f"{path_file} is not an event log")
+                strings = []
+                continue
+            if strings is None:
+                raise ValueError(f"{path_file} is not an event log")
+            head = kind + f.read(BLOCK.size - 1)
+            if len(head) != BLOCK.size:
+                raise ValueError(f"Event log {path_file} is truncated")
+            kind, count = BLOCK.unpack(head)
+            if kind == STRINGS:
+                for _ in range(count):
+                    size, = STRING_SIZE.unpack(f.read(STRING_SIZE.size))
+                    strings.append(f.read(size).decode())
+            elif kind == RECORDS:
+                base, *sizes = COLUMNS_HEADER.unpack(f.read(COLUMNS_HEADER.size))
+                columns = []
+                for size in sizes:
+                    data = f.read(count * size)
+                    if len(data) != count * size:
+                        raise ValueError(f"Event log {path_file} is truncated")
+                    columns.append((size, data))
+                yield strings, base, columns
+            else:
+                raise ValueError(f"Unknown block {kind} in {path_file}")
+
+def read_events(path_file):
+    ''' Generator of the events of the file as (time, log file, port,
+    kind, value, repeat, data), the strings are resolved and port, value
+    and data are None if the event has not them '''
+    for strings, base, columns in read_blocks(path_file):
+        # the string 0 is None
+        names = [None] + strings
+        times, files, ports, kinds, values, repeats, datas = [from_bytes(data, size) for size, data in columns]
+        for time, name_file, port, kind, value, repeat, data in zip(times, files, ports, kinds, values, repeats, datas):
+            yield (base + time, names[name_file], names[port], kind, None if value == NO_VALUE else value, repeat, names[data])
+
+def write_text(path_file, output_dir):
+    ''' Write on output_dir the text log files of the events '''
+    from logger import Log_Buffer
+
+    os.makedirs(output_dir, exist_ok=True)
+    # the lines are appended in the order of the events as the loggers do
+    buffer = Log_Buffer(flush_interval=float("inf"))
+    try:
+        for time, name_file, port, kind, value, repeat, data in read_events(path_file):
+            path_log = os.path.join(output_dir, name_file)
+            if kind == OPEN:
+                buffer.handle(path_log)
+                continue
+            message = format_event(kind, port, value, data)
+            buffer.write(path_log, "".join([str(time + i) + " " + message + "\n" for i in range(repeat)]))
+    finally:
+        buffer.close()
+
+def iter_arrays(path_file):
+    ''' Generator of the blocks of records of the file as NumPy arrays,
+    every block is (strings, columns) where columns is a dict of arrays
+    by name of column. The ids of the strings are indexes of strings, -1
+    if the record has not the field, the value is -1 if there is not one '''
+    if np is None:
+        raise MissingDependencyException("numpy", "event log arrays")
+    for strings, base, columns in read_blocks(path_file):
+        arrays = {name: np.frombuffer(data, dtype=f"<u{size}") for name, (size, data) in zip(COLUMNS, columns)}
+        arrays["time"] = arrays["time"].astype(np.int64) + base
+        for name in ("file", "port", "data"):
+            arrays[name] = arrays[name].astype(np.int64) - 1
+        value = arrays["value"].astype(np.int16)
+        value[value == NO_VALUE] = -1
+        arrays["value"] = value
+        yield strings, arrays
+
+def read_arrays(path_file):
+    ''' Return the records of the file as a dict of NumPy arrays by name of
+    column and the list of strings (as iter_arrays), the strings of all
+    the segments are moved to one table '''
+    ids, blocks = {}, []
+    for segment, arrays in iter_arrays(path_file):
+        # ids of the strings of the segment in the table of all the segments, -1 is kept
+        remap = np.array([ids.setdefault(text, len(ids)) for text in segment] + [-1], dtype=np.int64)
+        for name in ("file", "port", "data"):
+            arrays[name] = remap[arrays[name]]
+        blocks.append(arrays)
+    if len(blocks) == 0:
+        return {name: np.empty(0, dtype=np.int64) for name in COLUMNS}, list(ids)
+    return {name: np.concatenate([arrays[name] for arrays in blocks]) for name in COLUMNS}, list(ids)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Read a binary event log")
+    parser.add_argument("log", help="event log file")
+    parser.add_argument("--text", default=None, help="folder where the text log files are written")
+    args = parser.parse_args()
+
+    if args.text is not None:
+        write_text(args.log, args.text)
+    else:
+        # number of events of every kind
+        counts = {}
+        for event in read_events(args.log):
+            counts[event[3]] = counts.get(event[3], 0) + 1
+        for kind, count in sorted(counts.items()):
+            print(f"{KIND_NAMES[kind]}: {count}")
@@ -22,3 +22,17 @@ class MissConfigFileException(Exception):
 class UnknowKeyOfConfigException(Exception):
     def __init__(self, key):
         super().__init__(f"Unknown key {key} on config dict")
+
+class InvalidValueOfConfigException(Exception):
+    def __init__(self, key, value):
+        super().__init__(f"Invalid value {value!r} of key {key} on config dict")
+
+class SimulationWorkerException(Exception):
+    ''' Represent an exception raised by a simulation on a worker process '''
+    def __init__(self, msg="Simulation failed on a worker process"):
+        super().__init__(msg)
+
+class MissingDependencyException(Exception):
+    ''' Represent an exception about an optional package that is not installed '''
+    def __init__(self, package, feature):
+        super().__init__(f"{feature} requires the package {package}, install it with pip install {package}")
@@ -1,27 +1,92 @@
+import struct
+from util import INIT_FRAME_BIT
+
 class Frame:
-    def __init__(self, str_frame):
-        f_decoded = Frame.decode(str_frame)
-        self.init = f_decoded["init"]
-        self.mac_dest = f_decoded["mac_dest"]
-        self.mac_origin = f_decoded["mac_origin"]
-        self.size_data = f_decoded["size_data"]
-        self.size_detection = f_decoded["size_detection"]
-        self.data = f_decoded["data"]
-        self.detection_code = f_decoded["detection_code"]
-    
+    ''' Represent a frame, the MACs are integers and the data and the 
+    detection code are bytes. The packed form of a frame is:
+
+        MAC of destination (2 bytes)
+        MAC of origin (2 bytes)
+        size of data (1 byte)
+        size of detection code (1 byte)
+        data
+        detection code
+
+    The string of bits (INIT bit followed by '0' and '1') is only built 
+    when the frame is put on the wire '''
+    __slots__ = ("mac_dest", "mac_origin", "data", "detection_code")
+
+    HEADER = struct.Struct(">HHBB")
+
+    def __init__(self, mac_dest, mac_origin, data, detection_code):
+        self.mac_dest = mac_dest
+        self.mac_origin = mac_origin
+        # bytes-like object, it is a memoryview of the packed buffer when the frame was decoded
+        self.data = data
+        self.detection_code = detection_code
+
+    @property
+    def size_data(self):
+        return len(self.data)
+
+    @property
+    def size_detection(self):
+        return len(self.detection_code)
+
+    def encode(self):
+        ''' Return the packed representation of the frame '''
+        return Frame.HEADER.pack(self.mac_dest, self.mac_origin, self.size_data, self.size_detection) + bytes(self.data) + bytes(self.detection_code)
+
+    @classmethod
+    def decode(cls, buffer):
+        ''' Receive a packed frame and return a Frame whose data and 
+        detection code are memoryviews of the buffer (no copy is made) '''
+        view = memoryview(buffer)
+        mac_dest, mac_origin, size_data, size_detection = Frame.HEADER.unpack_from(view)
+        start = Frame.HEADER.size
+        return cls(mac_dest, mac_origin, view[start:start+size_data], view[start+size_data:start+size_data+size_detection])
+
+    @classmethod
+    def decode_many(cls, buffer):
+        ''' Receive packed frames one after the other and return the list 
+        of Frames, their data and detection code are memoryviews of the buffer '''
+        view = memoryview(buffer)
+        frames = []
+        start = 0
+        while start < len(view):
+            mac_dest, mac_origin, size_data, size_detection = Frame.HEADER.unpack_from(view, start)
+            start += Frame.HEADER.size
+            frames.append(cls(mac_dest, mac_origin, view[start:start+size_data], view[start+size_data:start+size_data+size_detection]))
+            start += size_data + size_detection
+        return frames
+
+    @classmethod
+    def from_bits(cls, frame):
+        ''' Receive the string of bits of a frame and return a Frame '''
+        size_data = int(frame[33:41], 2)
+        data = frame[49:49+size_data*8]
+        detection_code = frame[49+size_data*8:]
+        return cls(int(frame[1:17], 2), int(frame[17:33], 2), bits_to_bytes(data), bits_to_bytes(detection_code))
+
+    def to_bits(self):
+        ''' Return the string of bits that is sent through the wire '''
+        return "".join([INIT_FRAME_BIT, format(self.mac_dest, "016b"), format(self.mac_origin, "016b"), format(self.size_data, "08b"), format(self.size_detection, "08b"), bytes_to_bits(self.data), bytes_to_bits(self.detection_code)])
+
     def __str__(self):
-        return "".join([self.init,self.mac_dest, self.mac_origin, self.size_data, self.size_detection, self.data, self.detection_code])
+        return self.to_bits()
     
     def __repr__(self):
-        return str(self)
-        
-    @classmethod
-    def decode(cls,frame):
-        init = frame[0]
-        mac_dest = frame[1:17]
-        mac_origin = frame[17:33]
-        size_data = frame[33:41]
-        size_detection = frame[41:49]
-        data = frame[49:49+int(size_data,2)*8 ]
-        detection_code = frame[49+int(size_data,2)*8 : ]
-        return {"init":init, "mac_dest": mac_dest, "mac_origin": mac_origin, "size_data": size_data, "size_detection": size_detection, "data": data, "detection_code": detection_code}
\ No newline at end of file
+        return f"Frame({self.mac_dest:04X}, {self.mac_origin:04X}, {bytes(self.data).hex().upper()}, {bytes(self.detection_code).hex().upper()})"
+
+def bits_to_bytes(bits):
+    ''' Return the bytes of a string of bits (str or the ASCII bytes of 
+    the string), its length must be multiple of 8 '''
+    if len(bits) == 0:
+        return b""
+    return int(bits, 2).to_bytes(len(bits) // 8, "big")
+
+def bytes_to_bits(data):
+    ''' Return the string of bits of a bytes-like object '''
+    if len(data) == 0:
+        return ""
+    return format(int.from_bytes(data, "big"), f"0{8*len(data)}b")
@@ -0,0 +1,641 @@
+''' Frame-level simulation of switched networks (config "frame-level"). The
+hosts and the switches are joined by full-duplex links without hubs, so a
+frame can not collide and its bits arrive as they were sent. Instead of
+simulating every ms of every bit, every hop of a frame is computed at once:
+when its bits are stored by a switch port (the receive period of the port),
+when the switch starts to forward it (the destination MAC is complete),
+when the switch learns its origin MAC and when a host receives the MAC of
+destination and the last bit. The times follow the timing of the bit-level
+engine, so the data logs and the MAC tables are the same. A frame waits in
+the queue of its port while the ports before it write the wires of its
+destination, and the frames that a switch sends at once to a host are
+mixed on its wire as Switch.forward does (the host reads the frames that
+start with INIT).
+
+The frames are events on a priority queue by (ms, phase, order, sub), the
+phases of a ms are the ones of Simulator.run. If the network leaves the
+cases that are computed exactly (a hub, bits that are not a frame, two
+frames at once on the same port, on a link between switches or on a host
+that is receiving other frame, a frame that stops in the middle, a switch
+whose table is full or that learns the destination of a frame that is
+sending, a link that changes while a frame uses it) the frame-level run
+is discarded and the simulation is done bit by bit. Only the data logs
+are written, the logs of the bits of every device are empty.
+
+    python frame_level.py [script.txt] --signal-time 10
+
+simulates a script (a switched network linked at ms 0 by default) bit by
+bit and frame by frame and exits with 1 if the frame-level run falls back
+or its data logs are not the ones of the bit-level run '''
+import argparse
+import heapq
+import os
+import sys
+import tempfile
+from collections import OrderedDict
+from devices import check_received
+from event_log import DATA
+from frame import Frame, bits_to_bytes
+from instruction import Create, Connect, Disconnect, Mac, SendFrame
+from instruction_stream import Instruction_Stream
+from logger import Logger
+from strategy_factory import get_factory
+from util import bin_hex
+
+# network of hosts and switches linked at ms 0 that is simulated frame by frame
+EXAMPLE_SCRIPT = """0 create host A
+0 create host B
+0 create host C
+0 create switch S 3
+0 create switch T 2
+0 connect A_1 S_1
+0 connect B_1 S_2
+0 connect S_3 T_1
+0 connect C_1 T_2
+0 mac A A1
+0 mac B B2
+0 mac C C3
+10 send_frame A B2 12
+2000 send_frame B A1 34
+4000 send_frame C A1 78
+6000 send_frame A C3 56
+8000 send_frame B FFFF 9A
+"""
+
+# phases of a ms: the hosts keep sending, the switches send and the
+# instructions are executed, then the hosts read
+SENDING, SWITCHING, INSTRUCTIONS = range(3)
+
+class Fallback(Exception):
+    ''' The network can not be simulated frame by frame, the message is
+    the reason '''
+
+class Frame_Host:
+    ''' Host of the frame-level simulation '''
+    def __init__(self, name, order, detection):
+        self.name = name
+        # index of creation of the device
+        self.order = order
+        self.detection = detection
+        self.MAC = ""
+        self.MAC_value = None
+        # (peer device, peer port) of the port, None if it is not connected
+        self.links = [None]
+        # last ms of the frame that is sending (the ms of the empty channel),
+        # -inf if the host never sent
+        self.sending_until = float("-inf")
+        # last ms of the frames that are receiving, -inf if it never received
+        self.receiving_until = float("-inf")
+        # (first ms, last ms, Sending) of the bits that the host will read
+        self.schedule = []
+        # Sending that the host is receiving, None if it is not receiving
+        self.reading = None
+        # data log, it is created when the simulation ends
+        self.data_logger = None
+
+    def set_MAC(self, mac):
+        self.MAC = mac
+        self.MAC_value = int(mac, 2) if len(mac) == 16 else None
+
+    def active_until(self):
+        return max(self.sending_until, self.receiving_until)
+
+class Frame_Switch:
+    ''' Switch of the frame-level simulation, it keeps the state of the
+    bit-level Switch that changes from a frame to the next one '''
+    def __init__(self, name, order, no_ports, aging_time, max_macs):
+        self.name = name
+        self.order = order
+        self.links = [None] * no_ports
+        # tabla de las MAC, mac -> (puerto, tiempo en que se aprendio)
+        self.macs = OrderedDict()
+        self.aging_time = aging_time
+        self.max_macs = max_macs
+        # number of bits received by every port modulo the signal time (time_receiving)
+        self.calls = [0] * no_ports
+        # last ms that every port receives a bit
+        self.last_call = [-1] * no_ports
+        # position of the last send of every port, the queue is empty after it
+        self.last_pop = [None] * no_ports
+        # if the MAC of origin of every port was cleaned, a switch cleans it
+        # when it sends while the queue of the port is empty
+        self.fresh = [True] * no_ports
+        # (first, last, port) ms of the sends with the queue of the port not empty
+        self.busy = []
+        # frames that the switch is sending
+        self.sendings = []
+        # (last ms, destination, result of the lookup, port) of the frames that are forwarding
+        self.forwards = []
+        # last ms that the switch receives, stores or sends a bit, -inf if it
+        # was never active (an idle switch can be linked at ms 0)
+        self.last_active = float("-inf")
+        # number of frames that wait for a busy port, their last ms is not known
+        self.waiting = 0
+
+    def active_until(self):
+        return float("inf") if self.waiting != 0 else self.last_active
+
+    def clean_port(self, i):
+        self.calls[i] = 0
+        self.last_call[i] = -1
+        self.last_pop[i] = None
+        self.fresh[i] = True
+        # las MAC aprendidas por el puerto ya no son validas
+        for mac in [mac for mac, (port, _) in self.macs.items() if port == i]:
+            del self.macs[mac]
+
+    def lookup(self, mac, time):
+        ''' Switch.lookup at the time '''
+        entry = self.macs.get(mac)
+        if entry is None:
+            return None
+        port, learned = entry
+        if time - learned > self.aging_time or self.links[port] is None:
+            del self.macs[mac]
+            return None
+        self.macs.move_to_end(mac)
+        return port
+
+class Stream:
+    ''' Bits of a frame that a device sends by a port, one bit per ms from
+    start during calls ms (the bits after the frame are the empty channel).
+    order is the switch that sends them and its port, None if a host sends
+    them '''
+    __slots__ = ("bits", "start", "calls", "order")
+
+    def __init__(self, bits, start, calls, order=None):
+        self.bits = bits
+        self.start = start
+        self.calls = calls
+        self.order = order
+
+class Sending:
+    ''' Frame that a device sends by some ports from the ms first to last,
+    port is the port of the switch where the frame is stored (None if a
+    host sends it) '''
+    __slots__ = ("first", "last", "port", "ports", "bits")
+
+    def __init__(self, first, last, port, ports, bits):
+        self.first = first
+        self.last = last
+        self.port = port
+        self.ports = ports
+        self.bits = bits
+
+class Frame_Simulator:
+    ''' Simulate the instructions of a simulator frame by frame, run returns
+    False if the simulation must be done bit by bit '''
+    def __init__(self, simulator):
+        self.simulator = simulator
+        self.signal_time = simulator.signal_time
+        self.instructions = Instruction_Stream(simulator.instructions.path, plan_cache=simulator.plan_cache)
+        # devices by name and in order of creation
+        self.devices = {}
+        self.created = []
+        # priority queue of (position, sequence, function, args)
+        self.events = []
+        self.sequence = 0
+        # (ms, host, frame, line) of the received frames
+        self.received = []
+        # messages of the ignored instructions, they are printed if the run is not discarded
+        self.messages = []
+        self.time = 0
+        # reason by which the network is simulated bit by bit, None if it is not
+        self.fallback = None
+
+    def run(self):
+        try:
+            self.simulate()
+        except Fallback as fallback:
+            self.fallback = f"{fallback} at ms {self.time}"
+            print(f"frame-level: simulated bit by bit, {self.fallback}")
+            return False
+        for message in self.messages:
+            print(message)
+        self.write_logs()
+        return True
+
+    def push(self, position, function, *args):
+        self.sequence += 1
+        heapq.heappush(self.events, (position, self.sequence, function, args))
+
+    def simulate(self):
+        while len(self.events) != 0 or len(self.instructions) != 0:
+            # the instructions of a ms are executed after the sends of the switches of the ms
+            while len(self.instructions) != 0 and (len(self.events) == 0 or self.instructions.peek().time <= self.events[0][0][0]):
+                _instruction = self.instructions.pop()
+                self.push((_instruction.time, INSTRUCTIONS, 1, 0), self.execute, _instruction)
+            position, _, function, args = heapq.heappop(self.events)
+            self.time = position[0]
+            function(position, *args)
+        for device in self.created:
+            if isinstance(device, Frame_Host):
+                self.read(device, float("inf"))
+
+    #region Instructions
+    def device(self, name, kind=None):
+        device = self.devices.get(name)
+        if device is None or (kind is not None and not isinstance(device, kind)):
+            raise Fallback(f"the instruction uses {name}, that is not a device of its kind")
+        return device
+
+    def execute(self, position, instruction):
+        if isinstance(instruction, SendFrame):
+            self.send_frame(position, instruction)
+        elif isinstance(instruction, Create):
+            self.create(instruction)
+        elif isinstance(instruction, Connect):
+            self.connect(instruction)
+        elif isinstance(instruction, Disconnect):
+            self.disconnect(instruction)
+        elif isinstance(instruction, Mac):
+            host = self.device(instruction.host, Frame_Host)
+            # the MAC of the ms before is the one of the frames that were read
+            self.read(host, self.time - 1)
+            host.set_MAC(instruction.mac_bits)
+        else:
+            # the bits of send are not a frame, a switch can not forward them frame by frame
+            raise Fallback(f"{instruction.host} sends bits that are not a frame")
+
+    def create(self, instruction):
+        if instruction.type == "hub":
+            raise Fallback(f"the script creates the hub {instruction.name}")
+        if instruction.name in self.devices:
+            raise Fallback(f"the script creates {instruction.name} twice")
+        simulator = self.simulator
+        if instruction.sender:
+            device = Frame_Switch(instruction.name, len(self.created), instruction.no_ports, simulator.mac_aging_time, simulator.mac_table_size)
+        else:
+            device = Frame_Host(instruction.name, len(self.created), get_factory()[simulator.detection_method].get_instance())
+        self.devices[device.name] = device
+        self.created.append(device)
+
+    def connected(self, device_1, device_2):
+        ''' If there is a path of links between both devices '''
+        seen = {device_1}
+        pending = [device_1]
+        while len(pending) != 0:
+            device = pending.pop()
+            if device is device_2:
+                return True
+            for link in device.links:
+                if link is not None and link[0] not in seen:
+                    seen.add(link[0])
+                    pending.append(link[0])
+        return False
+
+    def connect(self, instruction):
+        device_1, device_2 = self.device(instruction.device_1), self.device(instruction.device_2)
+        port_1, port_2 = instruction.port_1, instruction.port_2
+        if not (0 <= port_1 < len(device_1.links) and 0 <= port_2 < len(device_2.links)):
+            raise Fallback(f"{device_1.name} or {device_2.name} has no port to connect")
+        if device_1.links[port_1] is not None or device_2.links[port_2] is not None:
+            self.messages.append('Busy port. Ignored action')
+            return
+        # a frame that is sending would reach the new link in the middle, a
+        # loop of switches forwards the floods forever
+        if device_1.active_until() >= self.time - 1 or device_2.active_until() >= self.time - 1:
+            raise Fallback(f"{device_1.name} or {device_2.name} is connected while a frame uses it")
+        if self.connected(device_1, device_2):
+            raise Fallback(f"connecting {device_1.name} and {device_2.name} closes a loop")
+        device_1.links[port_1] = (device_2, port_2)
+        device_2.links[port_2] = (device_1, port_1)
+
+    def disconnect(self, instruction):
+        device = self.device(instruction.device_1)
+        port = instruction.port_1
+        if not 0 <= port < len(device.links):
+            raise Fallback(f"{device.name} has no port to disconnect")
+        if device.links[port] is None:
+            self.messages.append('Unconnected port. Ignored action')
+            return
+        peer, peer_port = device.links[port]
+        if device.active_until() >= self.time - 1 or peer.active_until() >= self.time - 1:
+            raise Fallback(f"{device.name} or {peer.name} is disconnected while a frame uses it")
+        device.links[port] = None
+        peer.links[peer_port] = None
+        for _device, _port in ((device, port), (peer, peer_port)):
+            if isinstance(_device, Frame_Switch):
+                _device.clean_port(_port)
+
+    def send_frame(self, position, instruction):
+        host = self.device(instruction.host, Frame_Host)
+        # the host is sending, the instruction is executed again in the next ms
+        if self.time < host.sending_until:
+            self.push((self.time + 1, INSTRUCTIONS, 0, self.sequence), self.execute, instruction)
+            return
+        data = instruction.payload
+        frame = Frame(instruction.mac_to_value, int(host.MAC or "0", 2), data, host.detection.apply_bytes(data))
+        # the fields of the header must have their sizes and the host must
+        # receive data and detection code to deliver the frame
+        if frame.mac_dest > 0xFFFF or frame.mac_origin > 0xFFFF or not (0 < frame.size_data < 256 and 0 < frame.size_detection < 256):
+            raise Fallback(f"the frame of {host.name} has a field out of its size")
+        bits = frame.to_bits()
+        st = self.signal_time
+        # the empty channel is sent in the ms after the last bit
+        host.sending_until = self.time + len(bits) * st
+        if host.links[0] is None:
+            return
+        stream = Stream(bits, self.time, len(bits) * st + 1)
+        peer, peer_port = host.links[0]
+        if isinstance(peer, Frame_Host):
+            self.receive(peer, bits, self.time, self.time + len(bits) * st - 1)
+        else:
+            self.arrive(peer, peer_port, stream, position)
+    #endregion Instructions
+
+    #region Switches
+    def call_position(self, stream, j, first):
+        ''' Position of the call j of the stream, first is the position of
+        the first call of a host (the send_frame instruction) '''
+        if stream.order is None:
+            return first if j == 0 else (stream.start + j, SENDING, 0, 0)
+        return (stream.start + j, SWITCHING) + stream.order
+
+    def arrive(self, switch, i, stream, first):
+        ''' The stream starts to arrive to the port i of the switch, as
+        Switch.resend the port stores the bit of the ms when its receive
+        period starts, the period starts when the port received a multiple
+        of signal time bits '''
+        st = self.signal_time
+        if stream.start <= switch.last_call[i]:
+            raise Fallback(f"two frames arrive at once to the port {i + 1} of {switch.name}")
+        off = (st - switch.calls[i]) % st
+        switch.calls[i] = (switch.calls[i] + stream.calls) % st
+        switch.last_call[i] = stream.start + stream.calls - 1
+        items = (stream.calls - 1 - off) // st + 1
+
+        own = lambda ms: (ms, SWITCHING, switch.order, i)
+        # a frame that arrives while the queue is not empty is mixed with the previous one
+        stored = self.call_position(stream, off, first)
+        if switch.last_pop[i] is not None and stored < switch.last_pop[i]:
+            raise Fallback(f"a frame arrives to the port {i + 1} of {switch.name} before its queue is empty")
+        # the frame is forwarded when its destination MAC is stored (17 bits with INIT)
+        complete = self.call_position(stream, 16 * st + off, first)
+        start = complete[0] if complete < own(complete[0]) else complete[0] + 1
+        end = start + items * st - 1
+        first_busy = stored[0] if stored < own(stored[0]) else stored[0] + 1
+
+        # the MAC of origin is cleaned if the switch sends between the frames, the
+        # sends of the frames that start to arrive later are checked by learn
+        previous = None if switch.fresh[i] else switch.last_pop[i][0]
+        cleaned = previous is None or self.cleaned(switch, i, previous, first_busy)
+        # the intervals that end before the learn of the frames that are arriving are not needed
+        switch.busy = [interval for interval in switch.busy if interval[1] >= self.time - 34 * st - 2]
+        interval = [first_busy, end, i]
+        switch.busy.append(interval)
+        switch.last_pop[i] = own(end)
+        switch.fresh[i] = False
+        switch.last_active = max(switch.last_active, end, switch.last_call[i])
+
+        # the MAC of origin is complete with the bit 32
+        self.push(self.call_position(stream, 32 * st + off, first), self.learn, switch, i, stream.bits[17:33], cleaned, previous, first_busy)
+        self.push(own(start), self.forward, switch, i, stream.bits, items, interval)
+
+    def cleaned(self, switch, i, previous, first_busy):
+        ''' If the switch sends after the ms previous and before the ms
+        first_busy, the ports that are not empty make it send '''
+        return any(k != i and first <= first_busy - 1 and last >= previous + 1 for first, last, k in switch.busy)
+
+    def learn(self, position, switch, i, mac, cleaned, previous, first_busy):
+        ''' The switch learns the MAC of origin of the frame of port i if the
+        MAC of origin of the previous frame was cleaned, a send of the switch
+        between the frames with the port empty cleans it '''
+        if not (cleaned or self.cleaned(switch, i, previous, first_busy)):
+            return
+        if mac not in switch.macs and len(switch.macs) >= switch.max_macs:
+            raise Fallback(f"the MAC table of {switch.name} is full")
+        # the frames that are forwarding look up their MAC in every ms
+        switch.forwards = [forward for forward in switch.forwards if forward[0] >= self.time]
+        for last, destination, port, k in switch.forwards:
+            if destination == mac and port != i and position < (last, SWITCHING, switch.order, k):
+                raise Fallback(f"{switch.name} learns the destination of a frame that it is forwarding")
+        switch.macs[mac] = (i, self.time)
+        switch.macs.move_to_end(mac)
+
+    def forward(self, position, switch, i, bits, items, interval, waiting=None):
+        ''' The switch starts to send the frame of port i to the port of the
+        destination MAC or to every port, the destination can not change
+        until the last bit is sent. If the port of the destination is
+        sending the frame of a port before i, the frame waits in the queue
+        until the port is free (waiting is the port and the forward) '''
+        st = self.signal_time
+        destination = bits[1:17]
+        end = self.time + items * st - 1
+        j = switch.lookup(destination, self.time)
+        if waiting is not None and j != waiting[0]:
+            raise Fallback(f"the destination of a frame that waits in {switch.name} changes")
+        if j is not None:
+            if end - switch.macs[destination][1] > switch.aging_time:
+                raise Fallback(f"a MAC of {switch.name} ages while a frame is forwarded to it")
+            ports = [j]
+        else:
+            ports = [k for k in range(len(switch.links)) if switch.links[k] is not None and k != i]
+        switch.sendings = [sending for sending in switch.sendings if sending.last >= self.time]
+        sending = Sending(self.time, end, i, ports, bits)
+        intervals, stopped = self.assign(switch.sendings + [sending])
+        if stopped is sending and len(intervals) == 0:
+            # the wires of all the ports are written by the ports before i, the
+            # frame waits in the queue until a frame ends
+            if waiting is None:
+                # while it waits the queue of the port and the switch are busy until an unknown ms
+                waiting = (j, [float("inf"), destination, j, i])
+                switch.forwards.append(waiting[1])
+                switch.waiting += 1
+                interval[1] = float("inf")
+                switch.last_pop[i] = (float("inf"), SWITCHING, switch.order, i)
+            free = min(other.last for other in switch.sendings) + 1
+            self.push((free, SWITCHING, switch.order, i), self.forward, switch, i, bits, items, interval, waiting)
+            return
+        # a frame that stops in the middle would be sent later than the bits of the queue
+        if stopped is not None:
+            raise Fallback(f"a frame of {switch.name} stops in the middle")
+        for k in ports:
+            # a switch that receives a part of a frame mixes it with the next one
+            if isinstance(switch.links[k][0], Frame_Switch) and any(k in other.ports for other in switch.sendings):
+                raise Fallback(f"two frames cross at once the link of the port {k + 1} of {switch.name}")
+        if waiting is None:
+            switch.forwards.append([end, destination, j, i])
+        else:
+            waiting[1][0] = end
+            switch.waiting -= 1
+            interval[1] = end
+            switch.last_pop[i] = (end, SWITCHING, switch.order, i)
+            switch.last_active = max(switch.last_active, end)
+        switch.sendings.append(sending)
+
+        # the hosts read the bits that the new frame resends or that it does not let write
+        for k in set(k for other in switch.sendings for k in other.ports):
+            host = switch.links[k][0]
+            if isinstance(host, Frame_Host):
+                self.read(host, self.time - 1)
+                host.schedule = [(first, last, reads[k]) for first, last, reads in intervals if k in reads]
+                host.receiving_until = max(host.receiving_until, end)
+        for k in ports:
+            peer, peer_port = switch.links[k]
+            if isinstance(peer, Frame_Switch):
+                self.arrive(peer, peer_port, Stream(bits, self.time, items * st, (switch.order, i)), position)
+
+    def assign(self, sendings):
+        ''' As Switch.forward the ports send in order, a port writes the
+        empty wires of its frame and, since it writes one, it resends the
+        bit by the next ports of the frame even if their wires are written.
+        Return the (first ms, last ms, Sending read by port) from now until
+        the frames end and the first Sending that can not write any wire
+        (None if every frame is sent) '''
+        sendings = sorted(sendings, key=lambda sending: sending.port)
+        times = sorted({self.time} | {sending.last + 1 for sending in sendings})
+        intervals = []
+        for first, following in zip(times, times[1:]):
+            written, reads = set(), {}
+            for sending in sendings:
+                if sending.last < first:
+                    continue
+                sent = False
+                for k in sending.ports:
+                    if k not in written:
+                        written.add(k)
+                        sent = True
+                    if sent:
+                        reads[k] = sending
+                if not sent and len(sending.ports) != 0:
+                    return intervals, sending
+            intervals.append((first, following - 1, reads))
+        return intervals, None
+    #endregion Switches
+
+    #region Hosts
+    def receive(self, host, bits, start, end):
+        ''' The frame of a host is written on the wire of the host '''
+        self.read(host, start - 1)
+        host.schedule.append((start, end, Sending(start, end, None, [0], bits)))
+        host.receiving_until = max(host.receiving_until, end)
+
+    def read(self, host, until):
+        ''' The host reads its wire until the ms until '''
+        while len(host.schedule) != 0 and host.schedule[0][0] <= until:
+            first, last, sending = host.schedule[0]
+            if last <= until:
+                host.schedule.pop(0)
+            else:
+                host.schedule[0] = (until + 1, last, sending)
+                last = until
+            self.read_stream(host, sending, first, last)
+
+    def read_stream(self, host, sending, first, last):
+        ''' As Host.read the host reads the frame from the ms first to last.
+        The INIT bit restarts the receive period, so every bit is stored in
+        the first ms that it is read, the bits without INIT are ignored by
+        a host that is not receiving '''
+        st = self.signal_time
+        start, bits = sending.first, sending.bits
+        if first == start:
+            host.reading = sending
+        elif host.reading is not sending:
+            # the receive period would start in the middle of the INIT bit or
+            # the bits would be stored after the bits of another frame
+            if first < start + st or host.reading is not None:
+                raise Fallback(f"{host.name} receives bits without INIT in the middle of a frame")
+            return
+        # the MAC of destination is complete with the bit 16
+        check = start + 16 * st
+        if first <= check <= last:
+            mac = int(bits[1:17], 2)
+            if mac != host.MAC_value and mac != 0xFFFF:
+                host.reading = None
+                return
+        delivery = start + (len(bits) - 1) * st
+        if first <= delivery <= last:
+            self.deliver(delivery, host, bits)
+            host.reading = None
+
+    def deliver(self, time, host, bits):
+        ''' As Host.deliver, bits are the received bits with INIT '''
+        bits = bits[1:]
+        end = len(bits)
+        size = int(bits[32:40], 2)
+        data_end = min(48 + 8*size, end)
+        frame = Frame(int(bits[0:16], 2), int(bits[16:32], 2), bits_to_bytes(bits[48:data_end]), bits_to_bytes(bits[data_end:end]))
+        self.received.append((time, host, frame, f"{bin_hex(bits[16:32])} {bin_hex(bits[48:48 + 8*size])}"))
+    #endregion Hosts
+
+    def write_logs(self):
+        ''' Create the log files of the devices and write the received frames
+        on the data logs, the frames of a ms are checked together '''
+        output_dir = self.simulator.output_dir
+        for device in self.created:
+            Logger(device.name + ".txt", output_dir, device.name)
+            if isinstance(device, Frame_Host):
+                Logger(device.name + "_payload.txt", output_dir, device.name)
+                device.data_logger = Logger(device.name + "_data.txt", output_dir, device.name)
+                device.data_logger.askForSimulationTime += self.get_time
+        # the frames are delivered in order of ms
+        self.received.sort(key=lambda received: received[0])
+        k = 0
+        while k < len(self.received):
+            self.time = self.received[k][0]
+            completed = []
+            while k < len(self.received) and self.received[k][0] == self.time:
+                _, host, frame, line = self.received[k]
+                if host.data_logger.enabled[DATA]:
+                    completed.append((host, frame, line))
+                k += 1
+            check_received(completed)
+        self.simulator.simulation_time = self.time
+
+    def get_time(self):
+        return self.time
+
+def read_logs(output_dir):
+    return {name: open(os.path.join(output_dir, name)).read() for name in os.listdir(output_dir) if name.endswith(".txt")}
+
+def check(script, signal_time=10, detection="hash-sum"):
+    ''' Simulate the script bit by bit and frame by frame, return the
+    problems of the frame-level run: it falls back, a log of bits is not
+    empty or a data log is not the one of the bit-level run '''
+    from simulator import Simulator
+
+    problems = []
+    with tempfile.TemporaryDirectory() as bit_dir, tempfile.TemporaryDirectory() as frame_dir:
+        simulator = Simulator(signal_time, script, detection, output_dir=bit_dir)
+        try:
+            simulator.run()
+        finally:
+            simulator.close()
+        simulator = Simulator(signal_time, script, detection, output_dir=frame_dir)
+        try:
+            frames = Frame_Simulator(simulator)
+            if not frames.run():
+                return [f"the network is simulated bit by bit: {frames.fallback}"]
+        finally:
+            simulator.close()
+        bit_logs, frame_logs = read_logs(bit_dir), read_logs(frame_dir)
+    if set(bit_logs) != set(frame_logs):
+        problems.append("the log files are not the same")
+    for name, text in sorted(frame_logs.items()):
+        if name.endswith("_data.txt"):
+            if text != bit_logs.get(name):
+                problems.append(f"{name} is not the one of the bit-level simulation")
+        elif text != "":
+            problems.append(f"{name} has logs of bits")
+    return problems
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the frame-level and the bit-level simulations of a script")
+    parser.add_argument("script", nargs="?", default=None, help="instruction file, a switched network linked at ms 0 by default")
+    parser.add_argument("--signal-time", type=int, default=10, help="ms of every bit")
+    parser.add_argument("--detection", default="hash-sum", help="error detection of the hosts")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        script = args.script
+        if script is None:
+            script = os.path.join(folder, "script.txt")
+            with open(script, "w") as f:
+                f.write(EXAMPLE_SCRIPT)
+        problems = check(script, args.signal_time, args.detection)
+    for problem in problems:
+        print(problem)
+    if len(problems) != 0:
+        sys.exit(1)
+    print("The frame-level simulation is the bit-level one")
@@ -1,12 +1,10 @@
-from strategy_detection import IStrategy_Detection
-from frame import Frame
+from strategy_detection import IStrategy_Detection, np, prefix, ranges, any_segment
 from util import mult_x
 
+# smallest sum of every number of bytes (2 to 8), the number of bytes of a sum is 1 plus its index
+SUM_BYTES = [1 << 8*k for k in range(1, 8)]
+
 class Hash_Detection(IStrategy_Detection):
-    def check(self, frame):
-        f = Frame(frame)
-        return f.detection_code == self.apply(f.data)[1]
-    
     def apply(self, data):
         """Apply a hash sum over data
         
@@ -25,6 +23,48 @@ class Hash_Detection(IStrategy_Detection):
         _s = mult_x(bin(sum(list_int))[2:], 8)
         return [mult_x(bin(len(_s)//8)[2:], 8), _s]
 
+    def apply_bytes(self, data):
+        """Apply a hash sum over the bytes of data
+
+        Args:
+            data (bytes): Data to send on a frame
+
+        Returns:
+            bytes: The hash sum with the minimum number of bytes (at least one)
+        """
+        _s = sum(data)
+        return _s.to_bytes(max(1, (_s.bit_length() + 7) // 8), "big")
+
+    def sums(self, data, starts, ends):
+        """Hash sum of every segment, the difference of the prefix sums of its ends"""
+        sums = prefix(data, np.add, np.int64)
+        return sums[ends] - sums[starts]
+
+    def apply_many(self, datas):
+        """Apply a hash sum over the data of many frames, the sums are
+        computed by map without a method call per frame (building the
+        bytes of every sum costs more than the sums, so arrays do not help)
+
+        Args:
+            datas (list): Bytes-like objects
+
+        Returns:
+            list: The hash sum of each data as bytes
+        """
+        return [_s.to_bytes(max(1, (_s.bit_length() + 7) // 8), "big") for _s in map(sum, datas)]
+
+    def check_segments(self, data, data_starts, data_ends, codes, code_starts, code_ends):
+        """Compare every byte of the detection codes with the byte of the hash
+        sum at its position, the codes must have the bytes of their sums"""
+        sums = self.sums(data, data_starts, data_ends)
+        sizes = np.searchsorted(SUM_BYTES, sums, side="right") + 1
+        valid = code_ends - code_starts == sizes
+        index, segment, position = ranges(code_starts, code_ends)
+        # big endian, the byte k of a sum of n bytes is shifted 8*(n-1-k) bits (the codes of other size are not valid)
+        shift = np.clip(8 * (sizes[segment] - 1 - position), 0, 56)
+        expected = (sums[segment] >> shift) & 0xFF
+        return valid & ~any_segment(codes[index] != expected, segment, len(sums))
+
     def chunk(self, s, n):
         for start in range(0, len(s), n):
             yield s[start:start+n]
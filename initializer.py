@@ -9,7 +9,7 @@ class Initializer():
         self.config = {}
     
     def load_config(self):
-        path_config = Path(f"./{self._CONFIG_FILE_NAME}")
+        path_config = Path(self._CONFIG_FILE_NAME)
         
         if path_config.exists():
             with open(path_config) as f:
@@ -17,8 +17,10 @@ class Initializer():
         else:
             raise MissConfigFileException()
 
-    def get(self, key):
+    def get(self, key, default=None):
         if not key in self.config:
+            if default is not None:
+                return default
             raise UnknowKeyOfConfigException(key)
         return self.config[key]
 
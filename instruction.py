@@ -1,6 +1,7 @@
 import abc
 from exception import *
 from event import *
+from util import get_device_port, hex_bin, mult_x
 from executor import Connector, Setter_Mac, Disconnector, Sender, SenderFrame, Creator, SenderPacket
 
 #region Instruction
@@ -11,9 +12,21 @@ class Instruction(metaclass=abc.ABCMeta):
         self.time = time
         self.args = args
 
+    @classmethod
+    def from_plan(cls, fields):
+        ''' Return the instruction with the attributes of a compiled plan 
+        (see plan.py), the args are not parsed again '''
+        instruction = cls.__new__(cls)
+        instruction.__dict__ = fields
+        return instruction
+
+    @abc.abstractmethod
+    def execute(self, simulator):
+        ''' This function execute the instruction on the simulator '''
+        pass
     @abc.abstractmethod
-    def execute(self):
-        ''' This function execute the instruction '''
+    def devices(self):
+        ''' Return the names of the devices that the instruction uses '''
         pass
     @abc.abstractmethod
     def __str__(self):
@@ -27,9 +40,14 @@ class Mac(Instruction):
         super().__init__(time, args)
         self.host = args[0]
         self.mac = args[1]
+        # MAC as a string of 16 bits
+        self.mac_bits = mult_x(hex_bin(self.mac), 16)
 
-    def execute(self):
-        return Setter_Mac().execute(self)
+    def execute(self, simulator):
+        return Setter_Mac(simulator).execute(self)
+
+    def devices(self):
+        return [self.host]
 
     def __str__(self):
         return f"{self.time} mac {list_to_str(self.args)}"
@@ -39,7 +57,6 @@ class Mac(Instruction):
 
 class Create(Instruction):
     ''' Represent create instruction '''
-
     def __init__(self, time, args): 
         super().__init__(time, args)
 
@@ -60,8 +77,11 @@ class Create(Instruction):
         else:
             self.no_ports = 1
 
-    def execute(self):
-        return Creator().execute(self)
+    def execute(self, simulator):
+        return Creator(simulator).execute(self)
+
+    def devices(self):
+        return [self.name]
 
     def __str__(self):
         return f"{self.time} create {list_to_str(self.args)}"
@@ -84,8 +104,11 @@ class Connect(Instruction):
         
         self.port_1, self.port_2 = int(self.port_1) - 1, int(self.port_2) - 1
 
-    def execute(self):
-        return Connector().execute(self)
+    def execute(self, simulator):
+        return Connector(simulator).execute(self)
+
+    def devices(self):
+        return [get_device_port(self.name_1)[0], get_device_port(self.name_2)[0]]
 
     def __str__(self):
         return f"{self.time} connect {list_to_str(self.args)}"
@@ -103,9 +126,11 @@ class Send(Instruction):
         self.host = args[0]
         self.data = args[1]
 
-    def execute(self):
-        return Sender().execute(self)
+    def execute(self, simulator):
+        return Sender(simulator).execute(self)
         
+    def devices(self):
+        return [self.host]
 
     def __str__(self):
         return f"{self.time} send {list_to_str(self.args)}"
@@ -123,8 +148,11 @@ class Disconnect(Instruction):
         self.device_1, self.port_1 = args[0].split('_')
         self.port_1=int(self.port_1)-1
 
-    def execute(self):
-        return Disconnector().execute(self)
+    def execute(self, simulator):
+        return Disconnector(simulator).execute(self)
+
+    def devices(self):
+        return [get_device_port(self.args[0])[0]]
 
     def __str__(self):
         return f"{self.time} disconnect {list_to_str(self.args)}"
@@ -140,9 +168,16 @@ class SendFrame(Instruction):
         self.mac_to = args[1]
         self.host = args[0]
         self.dataSend = args[2]
+        # MAC of destination as integer and data of the frame as bytes
+        self.mac_to_value = int(self.mac_to, 16)
+        data = int(self.dataSend, 16)
+        self.payload = data.to_bytes(max(1, (data.bit_length() + 7) // 8), "big")
 
-    def execute(self):
-        return SenderFrame().execute(self)
+    def execute(self, simulator):
+        return SenderFrame(simulator).execute(self)
+
+    def devices(self):
+        return [self.host]
     
     def __str__(self):
         return f"{self.time} send_frame {list_to_str(self.args)}"
@@ -158,8 +193,11 @@ class SendPacket(Instruction):
         self.IP_to = args[2]
         self.dataSend = args[2]
     
-    def execute(self):
-        return SenderPacket().execute(self)
+    def execute(self, simulator):
+        return SenderPacket(simulator).execute(self)
+
+    def devices(self):
+        return [self.name_from]
 
     def __str__(self):
         return f"{self.time} send_packet {list_to_str(self.args)}"
@@ -1,20 +1,26 @@
 from instruction import InstructionFactory
 
+# factories of the instructions by name, they are built the first time that an instruction is parsed
+_factories = None
+
 def getAllFactory():
     ''' this function returns a dictionary where the key 
     is the name of the class inheriting from Instruction 
-    and an instance of the factory of that class ''' 
-
-    factories = {}
-    # get dinamically subclasses of instruction factory
-    for factory in InstructionFactory.__subclasses__():
-        temp = factory()
-        factories[temp.name] = temp
-    return factories
+    and an instance of the factory of that class, the 
+    factories are built once ''' 
+    global _factories
+    if _factories is None:
+        factories = {}
+        # get dinamically subclasses of instruction factory
+        for factory in InstructionFactory.__subclasses__():
+            temp = factory()
+            factories[temp.name] = temp
+        _factories = factories
+    return _factories
 
 def getInstruction(time, IType, args):
     ''' Receive time, type of instructions and args of 
     instructions, and return an object of this instruction '''
 
     factory = getAllFactory()
-    return factory[IType].getInstance(time, args)
\ No newline at end of file
+    return factory[IType].getInstance(time, args)
@@ -0,0 +1,101 @@
+from collections import deque
+from exception import CorruptInstructionException
+from plan import load_or_compile, script_hash
+
+def parse_script(_path, skip=0):
+    ''' Generator that reads the file line by line and yields the 
+    instructions, the times of the instructions must not decrease. The 
+    first skip instructions are checked but not built '''
+    from instruction_factory_method import getInstruction
+
+    last_time = None
+    with open(_path) as fd:
+        for no_line, item in enumerate(fd, 1):
+            # tokenize instruction
+            sInstruction = item.split()
+
+            # empty instruction then continue for 
+            if len(sInstruction) == 0:
+                continue
+
+            # valid length of instruction
+            if len(sInstruction) < 3:
+                raise CorruptInstructionException(f"Instruction is corrupted at line {no_line}")
+
+            # get values
+            time = int(sInstruction[0])
+            Itype = sInstruction[1]
+            args = sInstruction[2:]
+
+            if last_time is not None and time < last_time:
+                raise CorruptInstructionException(f"Time {time} at line {no_line} is lower than the time {last_time} of the previous instruction")
+            last_time = time
+
+            if skip > 0:
+                skip -= 1
+                continue
+            yield getInstruction(time, Itype, args)
+
+class Instruction_Stream:
+    ''' Read the instructions of a file lazily, only a small look-ahead 
+    window of parsed instructions is kept in memory. If plan_cache is a 
+    folder the instructions are loaded from the compiled plan of the file 
+    (see plan.py) '''
+    def __init__(self, _path, window_size=64, plan_cache=None):
+        self.path = _path
+        self.plan_cache = plan_cache
+        # instructions are parsed while the file is read
+        self.parser = self.open()
+        # number of instructions taken from the parser
+        self.consumed = 0
+        # max number of instructions parsed in advance
+        self.window_size = window_size
+        # parsed instructions that are not executed yet
+        self.window = deque()
+        self.fill()
+
+    def open(self, skip=0):
+        ''' Return the generator of the instructions of the file after the first skip '''
+        if self.plan_cache is None:
+            return parse_script(self.path, skip)
+        return load_or_compile(self.path, self.plan_cache, skip)
+
+    def __getstate__(self):
+        ''' The parser is not saved, the file is opened again when the 
+        stream is restored and the consumed instructions are skipped '''
+        state = self.__dict__.copy()
+        del state["parser"]
+        state["hash"] = script_hash(self.path)
+        return state
+
+    def __setstate__(self, state):
+        if script_hash(state["path"]) != state.pop("hash"):
+            raise CorruptInstructionException(f"The instruction file {state['path']} changed after the snapshot")
+        self.__dict__.update(state)
+        self.parser = self.open(self.consumed)
+
+    def fill(self):
+        ''' Parse instructions until the window is full or the file ends '''
+        while len(self.window) < self.window_size:
+            _instruction = next(self.parser, None)
+            if _instruction is None:
+                break
+            self.consumed += 1
+            self.window.append(_instruction)
+
+    def peek(self):
+        ''' Return the next instruction without consume it, None if there are no instructions left '''
+        if len(self.window) == 0:
+            return None
+        return self.window[0]
+
+    def pop(self):
+        ''' Consume and return the next instruction '''
+        _instruction = self.window.popleft()
+        if len(self.window) == 0:
+            self.fill()
+        return _instruction
+
+    def __len__(self):
+        ''' Number of instructions in the window, it is 0 only if there are no instructions left '''
+        return len(self.window)
@@ -1,6 +1,9 @@
 from abc import ABCMeta
 
 class IP(metaclass=ABCMeta):
+    # the attributes are in the __slots__ of the class that inherits
+    __slots__ = ()
+
     def __init__(self):
         self._assoc_ip = []
 
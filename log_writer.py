@@ -0,0 +1,54 @@
+import queue
+import threading
+
+class Log_Writer:
+    ''' Thread that writes the batches of the logs, the simulation puts on
+    a bounded queue the writes of a full batch (a function and its
+    arguments) and goes on while the thread does the file I/O. If the
+    queue is full the simulation waits until the thread takes a batch. An
+    error of the thread is raised by the next call of the simulation '''
+    def __init__(self, queue_size=16):
+        self.queue_size = queue_size
+        self.queue = queue.Queue(queue_size)
+        # exception of the last write that failed, it is raised on the simulation thread
+        self.error = None
+        self.thread = threading.Thread(target=self.run, name="log-writer", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            job = self.queue.get()
+            try:
+                # None is the end of the writes
+                if job is None:
+                    return
+                # the batches after an error are not written
+                if self.error is None:
+                    function, args = job
+                    function(*args)
+            except BaseException as e:
+                self.error = e
+            finally:
+                self.queue.task_done()
+
+    def check(self):
+        ''' Raise the error of the thread if a write failed '''
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def submit(self, function, *args):
+        ''' Call function(*args) on the thread after the previous writes '''
+        self.check()
+        self.queue.put((function, args))
+
+    def wait(self):
+        ''' Wait until the submitted writes are done '''
+        self.queue.join()
+        self.check()
+
+    def close(self):
+        ''' Wait until the submitted writes are done and stop the thread '''
+        self.queue.put(None)
+        self.thread.join()
+        self.check()
@@ -1,20 +1,238 @@
+from collections import OrderedDict
 from util import OUTPUT_DIR
 from event import EventHook
+from event_log import Event_Log, EVENT_LOG_FILE, OPEN, RECEIVE, SEND, SEND_OK, COLLISION, DATA, format_event
+from exception import InvalidValueOfConfigException
+from log_writer import Log_Writer
+import time
+
+# names of the kinds of events in the tracing config
+TRACE_KINDS = {"send": SEND_OK, "receive": RECEIVE, "resend": SEND, "collision": COLLISION, "data": DATA}
+# enabled kinds and samples of the loggers of the folders without tracing, 
+# they are never changed so all the loggers share them
+ALL_ENABLED = (True,) * (DATA + 1)
+NO_SAMPLE = (1,) * (DATA + 1)
+
+class Log_Buffer:
+    ''' Keep the log files open and batch in memory the lines written on 
+    them, the lines are written on disk when the buffer is full or when 
+    the flush interval is accomplished. If queue_size is not 0 the batches 
+    are written by a Log_Writer thread with a queue of queue_size batches '''
+    def __init__(self, buffer_size=4096, flush_interval=1.0, max_open_files=256, queue_size=0):
+        # max number of lines in memory
+        self.buffer_size = buffer_size
+        # max seconds that a line stays in memory
+        self.flush_interval = flush_interval
+        # max number of files opened at same time
+        self.max_open_files = max_open_files
+        self.queue_size = queue_size
+        # thread that writes the batches, None if they are written by the simulation
+        self.writer = Log_Writer(queue_size) if queue_size != 0 else None
+        # lines to write by path of file
+        self.lines = {}
+        # number of lines in memory
+        self.count = 0
+        # opened files, the least recently used is the first
+        self.handles = OrderedDict()
+        self.last_flush = time.monotonic()
+
+    def write(self, path_file, line):
+        ''' Add a line to the buffer of the file '''
+        lines = self.lines.get(path_file)
+        if lines is None:
+            lines = self.lines[path_file] = []
+        lines.append(line)
+        self.count += 1
+        if self.count >= self.buffer_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def handle(self, path_file):
+        ''' Return an opened handle of the file, if there are too many 
+        opened files then the least recently used is closed '''
+        log = self.handles.get(path_file)
+        if log is None:
+            if len(self.handles) >= self.max_open_files:
+                _, old = self.handles.popitem(last=False)
+                old.close()
+            log = self.handles[path_file] = open(path_file, "a")
+        else:
+            self.handles.move_to_end(path_file)
+        return log
+
+    def flush(self):
+        ''' Write on disk all the lines in memory, with a writer thread 
+        they are written after the flush returns '''
+        if self.writer is None:
+            self.write_lines(self.lines)
+        elif len(self.lines) != 0:
+            self.writer.submit(self.write_lines, self.lines)
+        self.lines = {}
+        self.count = 0
+        self.last_flush = time.monotonic()
+
+    def write_lines(self, lines):
+        for path_file, batch in lines.items():
+            log = self.handle(path_file)
+            log.write("".join(batch))
+            log.flush()
+
+    def sync(self):
+        ''' Write on disk all the lines in memory and wait until they are written '''
+        self.flush()
+        if self.writer is not None:
+            self.writer.wait()
+
+    def close_handles(self):
+        for log in self.handles.values():
+            log.close()
+        self.handles = OrderedDict()
+
+    def close(self):
+        ''' Write the lines in memory and close all the files, the writer 
+        thread ends when every batch is written '''
+        self.flush()
+        if self.writer is None:
+            self.close_handles()
+        else:
+            self.writer.submit(self.close_handles)
+            self.writer.close()
+
+class Trace:
+    ''' Events that the loggers of an output folder write: the enabled 
+    kinds (names of TRACE_KINDS), the devices (None is all of them) and 
+    the kinds of which only 1 of every N events is written '''
+    def __init__(self, kinds=None, devices=None, sample=None):
+        kinds = list(TRACE_KINDS) if kinds is None else kinds
+        sample = {} if sample is None else sample
+        for kind in kinds:
+            if kind not in TRACE_KINDS:
+                raise InvalidValueOfConfigException("trace-kinds", kind)
+        for kind, every in sample.items():
+            if kind not in TRACE_KINDS or not isinstance(every, int) or every < 1:
+                raise InvalidValueOfConfigException("trace-sample", {kind: every})
+        self.kinds = set(TRACE_KINDS[kind] for kind in kinds)
+        self.devices = None if devices is None else set(devices)
+        self.sample = {TRACE_KINDS[kind]: every for kind, every in sample.items()}
+        # the loggers share the tuples of the traced and of the untraced devices
+        self.traced = tuple(kind == OPEN or kind in self.kinds for kind in range(DATA + 1))
+        self.untraced = tuple(kind == OPEN for kind in range(DATA + 1))
+        self.samples = tuple(self.sample.get(kind, 1) for kind in range(DATA + 1))
+
+    def enabled(self, device):
+        ''' If every kind of event is written by the loggers of the device '''
+        return self.traced if self.devices is None or device in self.devices else self.untraced
 
 class Logger:
     ''' Represent an object that write on the log file '''
-    def __init__(self, name_file):
+    # buffers of the output folders that use the buffered mode, the loggers 
+    # of other folders write every line directly on the file
+    buffers = {}
+    # event logs of the output folders with the binary format, the loggers 
+    # of these folders write records instead of text lines
+    event_logs = {}
+    # tracing of the output folders that do not write every event
+    traces = {}
+
+    def __init__(self, name_file, output_dir=OUTPUT_DIR, device=None):
+        self.name_file = name_file
+        trace = Logger.traces.get(output_dir)
+        # if every kind of event is written, the devices check it before building the event
+        self.enabled = ALL_ENABLED if trace is None else trace.enabled(device)
+        # 1 of every sample[kind] events is written, counts[kind] is the number 
+        # of events of the kind (None if no kind is sampled)
+        self.sample = NO_SAMPLE if trace is None else trace.samples
+        self.counts = None if self.sample == NO_SAMPLE else [0] * (DATA + 1)
         # log file
-        self.path_file = OUTPUT_DIR + "/" + name_file
+        self.path_file = output_dir + "/" + name_file
+        # buffer of the output folder, None if every line is written directly on the file
+        self.buffer = Logger.buffers.get(output_dir)
+        # event log of the output folder, None if the log is the text file
+        self.event_log = Logger.event_logs.get(output_dir)
         # event that ask for simulation time to print
         self.askForSimulationTime = EventHook()
 
-        log = open(self.path_file, "a")
-        log.close()
+        if self.event_log is not None:
+            self.event_log.record(0, name_file, OPEN)
+        else:
+            log = open(self.path_file, "a")
+            log.close()
+
+
+    def __getstate__(self):
+        ''' The buffer is not saved, it is set when the logger is moved to 
+        the output folder of the restored simulation (move) '''
+        state = self.__dict__.copy()
+        state["buffer"] = None
+        state["event_log"] = None
+        return state
+
+    def move(self, output_dir):
+        ''' Write from now on the log file of the output folder '''
+        self.path_file = output_dir + "/" + self.name_file
+        self.buffer = Logger.buffers.get(output_dir)
+        self.event_log = Logger.event_logs.get(output_dir)
+
+    def event(self, kind, port=None, value=None, repeat=1, data=None):
+        ''' Log an event (the kinds of event_log), it is a record of the 
+        event log of the folder or a line of the text log. The sampled 
+        events are counted and only the first of every sample is written '''
+        every = self.sample[kind]
+        if every != 1:
+            count = self.counts[kind]
+            self.counts[kind] = count + 1
+            if count % every != 0:
+                return
+        if self.event_log is None:
+            self.write(format_event(kind, port, value, data), repeat)
+        else:
+            self.event_log.record(self.askForSimulationTime.fire(), self.name_file, kind, port, value, repeat, data)
+
+    def write(self, message, repeat=1):
+        ''' Write on log file, if repeat is greater than 1 the message is 
+        written once per ms from the current time '''
+        time = self.askForSimulationTime.fire()
+        if repeat == 1:
+            line = str(time) + " " + message + "\n"
+        else:
+            line = "".join([str(time + i) + " " + message + "\n" for i in range(repeat)])
+        if self.buffer is None:
+            log = open(self.path_file, "a")
+            log.write(line)
+            log.close()
+        else:
+            self.buffer.write(self.path_file, line)
+
+    @classmethod
+    def use_buffer(cls, buffer_size=4096, flush_interval=1.0, max_open_files=256, output_dir=OUTPUT_DIR, queue_size=0):
+        ''' Enable the buffered mode for the loggers of an output folder 
+        that are created from now on, if queue_size is not 0 the batches 
+        are written by a thread (Log_Writer) '''
+        cls.buffers[output_dir] = Log_Buffer(buffer_size, flush_interval, max_open_files, queue_size)
+
+    @classmethod
+    def use_event_log(cls, batch_size=65536, output_dir=OUTPUT_DIR, queue_size=0):
+        ''' Enable the binary event log (event_log.py) for the loggers of 
+        an output folder that are created from now on, if queue_size is 
+        not 0 the batches are written by a thread (Log_Writer) '''
+        cls.event_logs[output_dir] = Event_Log(output_dir + "/" + EVENT_LOG_FILE, batch_size, queue_size)
 
+    @classmethod
+    def use_trace(cls, kinds=None, devices=None, sample=None, output_dir=OUTPUT_DIR):
+        ''' Write only the events of the Trace on the loggers of an output 
+        folder that are created from now on '''
+        cls.traces[output_dir] = Trace(kinds, devices, sample)
 
-    def write(self, message):
-        ''' Write on log file '''
-        log = open(self.path_file, "a")
-        log.write(str(self.askForSimulationTime.fire()) + " " + message + "\n")
-        log.close()
\ No newline at end of file
+    @classmethod
+    def close(cls, output_dir=None):
+        ''' Write on disk the lines that are still in memory of an output 
+        folder, of all the folders if output_dir is None '''
+        for _dir in list(cls.buffers) if output_dir is None else [output_dir]:
+            buffer = cls.buffers.pop(_dir, None)
+            if buffer is not None:
+                buffer.close()
+        for _dir in list(cls.event_logs) if output_dir is None else [output_dir]:
+            event_log = cls.event_logs.pop(_dir, None)
+            if event_log is not None:
+                event_log.close()
+        for _dir in list(cls.traces) if output_dir is None else [output_dir]:
+            cls.traces.pop(_dir, None)
@@ -1,31 +1,29 @@
 from simulator_singleton import Simulator_Singleton as SS
+from initializer import Initializer
+from partition import simulate_parallel
+from profiler import Profiler
+import os
 
-if __name__ == "__main__":
+def simulate():
     # Give me an instance of the simulator class. This instance will 
     # be in charge of handling the entire simulation. It will also 
     # have the devices connected to the network. It will also handle 
     # the simulation times, the signal time, the pending instructions, 
     # the instructions that have to be executed in a time and it will 
     # also handle the data sending
+    simulator = SS.instance()
+    try:
+        simulator.run()
+    finally:
+        # write on disk the log lines that are still in memory
+        simulator.close()
+        # write the profiling report if it is enabled
+        Profiler.close()
 
-    while True:
-        # update the instructions that must be executed in the current simulation time
-        SS.instance().update_instructions()
-        
-        # clear devices 
-        SS.instance().clear_network_component()
-
-        # execute pending data sendings
-        SS.instance().execute_sending_device()
-        SS.instance().send_switch()
-
-        # execute the instructions of this time
-        SS.instance().execute_time_instructions()
-        SS.instance().read_host_wire()
+if __name__ == "__main__":
+    init = Initializer()
+    init.load_config()
 
-        # check if the simulation stop condition was reached
-        if SS.instance().must_stop():
-            break
-        
-        #then advance simulation time 
-        SS.instance().advance_simulation()
\ No newline at end of file
+    # the components of the network that never merge are simulated in parallel processes
+    if not (init.get("parallel-components", False) and simulate_parallel(init.config, init.get("parallel-workers", os.cpu_count() or 1))):
+        simulate()
@@ -1,13 +1,40 @@
-from strategy_detection import IStrategy_Detection
-from frame import Frame
+from strategy_detection import IStrategy_Detection, np, prefix
 from util import mult_x
 
+# detection code of every parity
+PARITY_CODES = (b"\x00", b"\x01")
+# parity of every byte
+PARITY_TABLE = None if np is None else np.array([bin(byte).count("1") & 1 for byte in range(256)], dtype=np.uint8)
+
 class Parity_Detection(IStrategy_Detection):
-    def check(self, frame):
-        f = Frame(frame)
-        return f.detection_code[-1] == self.apply(f.data)[1][-1]
+    def check_frame(self, frame):
+        # the parity is the last bit of the code, a frame without code is not valid
+        return len(frame.detection_code) != 0 and frame.detection_code[-1] & 1 == self.apply_bytes(frame.data)[-1]
     
     def apply(self, data):
         count_one = data.count('1')
         parity = "0"*7 + '1' if count_one %2 != 0 else "0"*8
         return ["0"*7 + '1', parity]
+
+    def apply_bytes(self, data):
+        return bytes([parity(data)])
+
+    def parities(self, data, starts, ends):
+        ''' Parity of every segment, the parity of the xor of its bytes, that 
+        is the xor of the prefix xors of its ends '''
+        xors = prefix(data, np.bitwise_xor, np.uint8)
+        return PARITY_TABLE[xors[ends] ^ xors[starts]]
+
+    def apply_segments(self, data, starts, ends):
+        return [PARITY_CODES[bit] for bit in self.parities(data, starts, ends).tolist()]
+
+    def check_segments(self, data, data_starts, data_ends, codes, code_starts, code_ends):
+        valid = code_ends > code_starts
+        if len(codes) == 0:
+            return valid
+        last = codes[np.maximum(code_ends - 1, 0)]
+        return valid & ((last & 1) == self.parities(data, data_starts, data_ends))
+
+def parity(data):
+    ''' Parity of the number of ones of a bytes-like object '''
+    return int.from_bytes(data, "big").bit_count() & 1
@@ -0,0 +1,136 @@
+import heapq
+import os
+import shutil
+import tempfile
+from exception import CorruptInstructionException, SimulationWorkerException
+from util import OUTPUT_DIR
+
+class Union_Find:
+    ''' Disjoint sets of device names '''
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, name):
+        if name not in self.parent:
+            self.parent[name] = name
+            return name
+        root = name
+        while self.parent[root] != root:
+            root = self.parent[root]
+        # path compression
+        while self.parent[name] != root:
+            self.parent[name], name = root, self.parent[name]
+        return root
+
+    def union(self, name_1, name_2):
+        ''' Join the sets of both names, return the root of the new set '''
+        root_1, root_2 = self.find(name_1), self.find(name_2)
+        if root_1 != root_2:
+            self.parent[root_2] = root_1
+        return root_1
+
+def find_components(_path):
+    ''' Return the components of the network of the instruction file,
+    every component is the list of the lines of its instructions. Two
+    groups of devices are the same component if some connect joins them.
+    Returns None if a connect joins two connected groups after one of them
+    started to send data (the components merge mid-run) or if the file can
+    not be parsed, in those cases the file must be simulated in one process '''
+    from instruction_factory_method import getInstruction
+    from instruction import Send, SendFrame, SendPacket
+
+    sets = Union_Find()
+    # roots of the groups that already sent data
+    sending = set()
+    # roots of the groups that have some connection
+    linked = set()
+    # instruction lines and the device whose group they belong to
+    lines = []
+    with open(_path) as fd:
+        for item in fd:
+            sInstruction = item.split()
+            if len(sInstruction) == 0:
+                continue
+            try:
+                _instruction = getInstruction(int(sInstruction[0]), sInstruction[1], sInstruction[2:])
+            except (CorruptInstructionException, ValueError, KeyError, IndexError):
+                return None
+
+            names = _instruction.devices()
+            if len(names) == 2:
+                root_1, root_2 = sets.find(names[0]), sets.find(names[1])
+                if root_1 != root_2:
+                    if (root_1 in sending or root_2 in sending) and root_1 in linked and root_2 in linked:
+                        return None
+                    root = sets.union(root_1, root_2)
+                    if root_1 in sending or root_2 in sending:
+                        sending.add(root)
+                linked.add(sets.find(names[0]))
+            elif isinstance(_instruction, (Send, SendFrame, SendPacket)):
+                sending.add(sets.find(names[0]))
+            lines.append((names[0], item if item.endswith("\n") else item + "\n"))
+
+    components = {}
+    for name, line in lines:
+        components.setdefault(sets.find(name), []).append(line)
+    return list(components.values())
+
+def split_components(components, workers):
+    ''' Distribute the components among the workers, the biggest first to
+    the worker with less instructions. Every worker gets its lines in the
+    order of the file '''
+    buckets = [[] for _ in range(min(workers, len(components)))]
+    sizes = [0] * len(buckets)
+    for component in sorted(components, key=len, reverse=True):
+        k = sizes.index(min(sizes))
+        buckets[k].append(component)
+        sizes[k] += len(component)
+    return [merge_lines(bucket) for bucket in buckets]
+
+def merge_lines(components):
+    ''' Merge the lines of some components keeping the times in order, the
+    lines of every component are already in order '''
+    keyed = [[(int(line.split()[0]), i, j, line) for j, line in enumerate(component)] for i, component in enumerate(components)]
+    return [line for _, _, _, line in heapq.merge(*keyed)]
+
+def simulate_parallel(config, workers):
+    ''' Simulate the independent components of the instruction file in
+    worker processes and append their log files to the output folder,
+    returns False if the file must be simulated in one process '''
+    from batch import run_batch
+
+    if not os.path.isfile(config["script-name"]):
+        return False
+    components = find_components(config["script-name"])
+    if components is None or len(components) < 2 or workers < 2:
+        return False
+
+    root = tempfile.mkdtemp(prefix="netsim-")
+    try:
+        jobs = []
+        for k, lines in enumerate(split_components(components, workers)):
+            script = os.path.join(root, f"script_{k}.txt")
+            with open(script, "w") as f:
+                f.writelines(lines)
+            worker_config = dict(config, **{"parallel-components": False})
+            if worker_config.get("profile", False):
+                # every worker writes its own profiling report
+                base, ext = os.path.splitext(worker_config.get("profile-output", OUTPUT_DIR + "/profile.json"))
+                worker_config["profile-output"] = f"{base}_{k}{ext}"
+            jobs.append({"script": script, "config": worker_config, "output": os.path.join(root, f"output_{k}")})
+
+        results = run_batch(jobs, len(jobs))
+        for result in results:
+            if "error" in result:
+                raise SimulationWorkerException(result["error"])
+
+        # the log files of the components are different, they are appended as the loggers do
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        for job in jobs:
+            for name in sorted(os.listdir(job["output"])):
+                # the event logs are binary, appending one to another is a valid log (event_log.py)
+                with open(os.path.join(job["output"], name), "rb") as src, open(os.path.join(OUTPUT_DIR, name), "ab") as dst:
+                    shutil.copyfileobj(src, dst)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return True
@@ -1,6 +1,10 @@
 from abc import ABCMeta
 from logger import Logger
+from util import OUTPUT_DIR
 
 class PayLoad:
-    def __init__(self, name):
-        self.payload_logger = Logger(name + "_payload.txt")
\ No newline at end of file
+    # the attributes are in the __slots__ of the class that inherits
+    __slots__ = ()
+
+    def __init__(self, name, output_dir=OUTPUT_DIR):
+        self.payload_logger = Logger(name + "_payload.txt", output_dir, name)
\ No newline at end of file
@@ -0,0 +1,140 @@
+''' Compiled plans of the instruction files. A script is parsed once into
+a plan that is stored with marshal on a cache folder, the name of the file
+is the hash of the content of the script, so the next simulations of the
+same script load the instructions without parsing it:
+
+    python plan.py script.txt --cache ./.plan-cache
+
+The plan is a header followed by chunks of records and an end mark, each
+one is marshaled and written after its size (4 bytes). A record is the
+name of the class of an instruction and its attributes, they are already
+converted when the script is parsed (ports are indexes, the data of the
+frames are bytes, MACs are integers) so loading an instruction is only
+setting its attributes. Every name of a device is one string object in
+the compiler, so marshal writes it once per chunk and references it
+after that '''
+import argparse
+import hashlib
+import marshal
+import os
+import struct
+import sys
+from exception import CorruptInstructionException
+
+# version of the format of the plans, the plans of other versions are not used
+PLAN_VERSION = 1
+PLAN_HEADER = ("net-sim plan", PLAN_VERSION)
+# number of instructions of a chunk of the plan
+CHUNK_SIZE = 1024
+# size of a chunk
+CHUNK_SIZE_FORMAT = struct.Struct(">I")
+
+def script_hash(_path):
+    ''' sha256 of the content of the file '''
+    digest = hashlib.sha256()
+    with open(_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def plan_path(_path, cache_dir):
+    ''' File of the plan of the script on cache_dir, the name depends on
+    the content of the script and on the versions of the plan and Python '''
+    return os.path.join(cache_dir, f"{script_hash(_path)}-{PLAN_VERSION}-py{sys.version_info[0]}{sys.version_info[1]}.plan")
+
+def write_chunk(f, chunk):
+    data = marshal.dumps(chunk)
+    f.write(CHUNK_SIZE_FORMAT.pack(len(data)))
+    f.write(data)
+
+def read_chunk(f):
+    ''' Return the next chunk of the plan, raise EOFError if the file ends '''
+    size = f.read(CHUNK_SIZE_FORMAT.size)
+    if len(size) != CHUNK_SIZE_FORMAT.size:
+        raise EOFError()
+    size, = CHUNK_SIZE_FORMAT.unpack(size)
+    data = f.read(size)
+    if len(data) != size:
+        raise EOFError()
+    return marshal.loads(data)
+
+def compile_script(_path, plan_file):
+    ''' Parse the script and write its plan, the plan is written on a
+    temporary file that is renamed when it is complete '''
+    from instruction_stream import parse_script
+
+    # one string object per name, so marshal writes every name once per chunk
+    names = {}
+    records = []
+    temp = f"{plan_file}.{os.getpid()}.tmp"
+    try:
+        with open(temp, "wb") as f:
+            write_chunk(f, PLAN_HEADER)
+            for _instruction in parse_script(_path):
+                fields = {key: names.setdefault(value, value) if type(value) is str else value for key, value in vars(_instruction).items()}
+                fields["args"] = [names.setdefault(arg, arg) for arg in fields["args"]]
+                records.append((names.setdefault(type(_instruction).__name__, type(_instruction).__name__), fields))
+                if len(records) == CHUNK_SIZE:
+                    write_chunk(f, records)
+                    records.clear()
+            if len(records) != 0:
+                write_chunk(f, records)
+            # end mark
+            write_chunk(f, None)
+        os.replace(temp, plan_file)
+    finally:
+        if os.path.exists(temp):
+            os.remove(temp)
+
+def is_plan(plan_file):
+    ''' If the file is a plan of this version '''
+    try:
+        with open(plan_file, "rb") as f:
+            return read_chunk(f) == PLAN_HEADER
+    except (OSError, EOFError, ValueError, TypeError):
+        return False
+
+def load_plan(plan_file, skip=0):
+    ''' Generator of the instructions of a plan after the first skip, the
+    chunks are read while the simulation consumes them '''
+    from instruction import Instruction
+
+    classes = {cls.__name__: cls for cls in Instruction.__subclasses__()}
+    with open(plan_file, "rb") as f:
+        if read_chunk(f) != PLAN_HEADER:
+            raise CorruptInstructionException(f"{plan_file} is not a plan of version {PLAN_VERSION}")
+        while True:
+            try:
+                records = read_chunk(f)
+            except EOFError:
+                raise CorruptInstructionException(f"Plan {plan_file} is truncated")
+            if records is None:
+                return
+            if skip >= len(records):
+                skip -= len(records)
+                continue
+            records, skip = records[skip:], 0
+            for name, fields in records:
+                yield classes[name].from_plan(fields)
+
+def load_or_compile(_path, cache_dir, skip=0):
+    ''' Return a generator of the instructions of the script after the
+    first skip, the plan is compiled on cache_dir if the script has not a
+    plan yet '''
+    os.makedirs(cache_dir, exist_ok=True)
+    plan_file = plan_path(_path, cache_dir)
+    if not is_plan(plan_file):
+        compile_script(_path, plan_file)
+    return load_plan(plan_file, skip)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile instruction files into plans")
+    parser.add_argument("scripts", nargs="+", help="instruction files")
+    parser.add_argument("--cache", default="./.plan-cache", help="folder of the plans")
+    args = parser.parse_args()
+
+    os.makedirs(args.cache, exist_ok=True)
+    for script in args.scripts:
+        plan_file = plan_path(script, args.cache)
+        compile_script(script, plan_file)
+        print(f"{script} -> {plan_file}")
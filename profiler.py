@@ -0,0 +1,132 @@
+import json
+import time
+
+# methods of the devices that are measured, by class
+DEVICE_METHODS = {
+    "Host": ["send", "keep_sending", "read", "skip_idle"],
+    "Resender": ["propagate"],
+    "Hub": ["resend"],
+    "Switch": ["resend", "send"],
+}
+
+# phases of the main loop
+PHASES = ["update_instructions", "clear_network_component", "execute_sending_device", "send_switch", "execute_time_instructions", "read_host_wire"]
+
+class Profiler:
+    ''' Record the wall time and the number of calls of the phases of the
+    simulation loop, of the executors and of the methods of the devices.
+    It is enabled from config.txt with "profile", when it is not enabled
+    nothing is instrumented. The report is a JSON file and a file of
+    folded stacks (path.folded) that flamegraph.pl and speedscope read.
+    The methods of the classes are instrumented once per process, they
+    record on the current profiler '''
+    # profiler of the simulation, None if the profiling is disabled
+    current = None
+    # if the executors and the devices are instrumented
+    instrumented = False
+
+    def __init__(self, path_file):
+        self.path_file = path_file
+        # category -> name -> [calls, total time, self time]
+        self.stats = {"phases": {}, "executors": {}, "devices": {}}
+        # names of the measured calls that are running
+        self.stack = []
+        # time spent in the children of each running call
+        self.children = []
+        # folded stack -> self time
+        self.stacks = {}
+        self.start = time.perf_counter()
+
+    def measure(self, category, name, function, *args, **kwargs):
+        ''' Call function and record its time '''
+        self.stack.append(name)
+        self.children.append(0.0)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            self_time = elapsed - self.children.pop()
+            if len(self.children) != 0:
+                self.children[-1] += elapsed
+
+            stat = self.stats[category].get(name)
+            if stat is None:
+                stat = self.stats[category][name] = [0, 0.0, 0.0]
+            stat[0] += 1
+            stat[1] += elapsed
+            stat[2] += self_time
+
+            folded = ";".join(self.stack)
+            self.stacks[folded] = self.stacks.get(folded, 0.0) + self_time
+            self.stack.pop()
+
+    def wrap_phase(self, name, function):
+        def phase(*args, **kwargs):
+            return self.measure("phases", name, function, *args, **kwargs)
+        return phase
+
+    @staticmethod
+    def wrap_method(category, method_name, function):
+        ''' The name of the call is the class of the object and the method '''
+        def method(obj, *args, **kwargs):
+            if Profiler.current is None:
+                return function(obj, *args, **kwargs)
+            return Profiler.current.measure(category, type(obj).__name__ + "." + method_name, function, obj, *args, **kwargs)
+        return method
+
+    def instrument(self, simulator):
+        ''' Replace the phases of the simulator, the execute of the
+        executors and the methods of the devices by measured ones '''
+        for name in PHASES:
+            setattr(simulator, name, self.wrap_phase(name, getattr(simulator, name)))
+        if not Profiler.instrumented:
+            Profiler.instrument_classes()
+
+    @staticmethod
+    def instrument_classes():
+        import devices
+        from executor import Executor
+
+        Profiler.instrumented = True
+        pending = list(Executor.__subclasses__())
+        while len(pending) != 0:
+            cls = pending.pop()
+            pending += cls.__subclasses__()
+            if "execute" in cls.__dict__:
+                cls.execute = Profiler.wrap_method("executors", "execute", cls.__dict__["execute"])
+
+        for class_name, methods in DEVICE_METHODS.items():
+            cls = getattr(devices, class_name)
+            for method_name in methods:
+                setattr(cls, method_name, Profiler.wrap_method("devices", method_name, cls.__dict__[method_name]))
+
+    def report(self):
+        ''' Return the report as a dict '''
+        report = {"total_time": time.perf_counter() - self.start}
+        for category, stats in self.stats.items():
+            report[category] = {name: {"calls": calls, "time": total, "self_time": self_time} for name, (calls, total, self_time) in sorted(stats.items(), key=lambda x: -x[1][1])}
+        return report
+
+    def dump(self):
+        ''' Write the JSON report and the folded stacks, the time of the
+        folded stacks is in microseconds '''
+        with open(self.path_file, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        with open(self.path_file + ".folded", "w") as f:
+            for folded, self_time in self.stacks.items():
+                f.write(f"{folded} {round(self_time * 1e6)}\n")
+
+    @classmethod
+    def enable(cls, simulator, path_file=None):
+        ''' Enable the profiling of the simulation, by default the report is 
+        written on profile.json of the output folder of the simulation '''
+        cls.current = Profiler(path_file or simulator.output_dir + "/profile.json")
+        cls.current.instrument(simulator)
+
+    @classmethod
+    def close(cls):
+        ''' Write the report if the profiling is enabled '''
+        if cls.current is not None:
+            cls.current.dump()
+            cls.current = None
@@ -1,6 +1,5 @@
 from devices import *
 from util import get_device_port
-from storage_device import Storage_Device_Singleton
 from random import randint
 
 class ShutUp:
@@ -12,7 +11,8 @@ class ShutUp:
         index_rv = list(filter(lambda x: x != -1,[i  if hub.read_value[i] != None else -1 for i in range(len(hub.ports))]))
         to_shut_up = self.find_root(hub.ports[randint(0, len(index_rv)-1)])
         if to_shut_up.sending_frame:
-            self.simulator_instance.pending.append(getInstruction(self.simulator_instance.simulation_time + 1, "send_frame", [to_shut_up.name, bin_hex(to_shut_up.data_to_send[1:17]), bin_hex(to_shut_up.data_to_send[49:])]))
+            frame = to_shut_up.sending_frame
+            self.simulator_instance.pending.append(getInstruction(self.simulator_instance.simulation_time + 1, "send_frame", [to_shut_up.name, f"{frame.mac_dest:X}", bytes(frame.data).hex().upper()]))
         else:
             self.simulator_instance.pending.append(getInstruction(self.simulator_instance.simulation_time +1, "send", [to_shut_up.name, to_shut_up.data_to_send]))
         self.simulator_instance.sending_device.remove(to_shut_up)
@@ -21,7 +21,7 @@ class ShutUp:
     def find_root(self, port_name):
         device_name,port = get_device_port(port_name)
         port=int(port)-1
-        component = Storage_Device_Singleton.instance().get_device_with(device_name)
+        component = self.simulator_instance.storage.get_device_with(device_name)
         while True:
             if isinstance(component,Host):
                return component
@@ -31,6 +31,6 @@ class ShutUp:
                 port_name=component.internal_port_connection[port]
             device_name,port=get_device_port(port_name)
             port=int(port)-1
-            component = Storage_Device_Singleton.instance().get_device_with(device_name)
+            component = self.simulator_instance.storage.get_device_with(device_name)
 
                
\ No newline at end of file
@@ -1,16 +1,25 @@
-from exception import NoneInstructionFileException, NonExistentInstructionFileException
+from exception import NoneInstructionFileException, NonExistentInstructionFileException, InvalidValueOfConfigException
 from os import path
-from util import bin_hex, hex_bin, mult_x, INIT_FRAME_BIT
-from storage_device import Storage_Device_Singleton
+import os
+import heapq
+from util import bin_hex, hex_bin, mult_x, INIT_FRAME_BIT, OUTPUT_DIR
+from storage_device import Storage_Device
+from wire_table import Wire_Table
+from logger import Logger
+from instruction_stream import Instruction_Stream
+from profiler import PHASES
+from frame_level import Frame_Simulator
 from devices import *
 
 class Simulator: 
     ''' the simulator class represents the structure in charge of simulating the network '''
-    def __init__(self, signal_time=10, instruction_file="./script.txt", detection="hash-sum"):
+    def __init__(self, signal_time=10, instruction_file="./script.txt", detection="hash-sum", mac_aging_time=300000, mac_table_size=1024, bit_period=False, expand_log=False, output_dir=OUTPUT_DIR, wire_backend="objects", plan_cache=None, frame_level=False, switch_buffers="bit"):
         # load signal time
         self.signal_time = signal_time
         if instruction_file == None:
             raise NoneInstructionFileException()
+        # folder of the compiled plans of the instruction files, None if the file is parsed
+        self.plan_cache = plan_cache
         # load instructions from file
         self.instructions = self.load_instruction(instruction_file)
         # simulation time in ms
@@ -21,42 +30,162 @@ class Simulator:
         self.sending_device = set()
         # instructions to execution at current time
         self.time_instruction = []
+        # priority queue with the times at which something happens on the network
+        self.events = []
+        self.schedule_next_instruction()
 
-        Storage_Device_Singleton.instance()
+        # devices and network components of this simulation, with the numpy 
+        # backend the channels of the wires are stored in one array
+        self.storage = Storage_Device(Wire_Table() if wire_backend == "numpy" else None)
+        # folder of the log files of this simulation
+        self.output_dir = output_dir
 
         self.detection_method = detection
+        # time in ms that a switch keeps a learned mac
+        self.mac_aging_time = mac_aging_time
+        # max number of macs in the table of a switch
+        self.mac_table_size = mac_table_size
+        # bit-period stepping, a held bit is propagated once per signal time instead of once per ms
+        self.bit_period = bit_period
+        # with bit-period stepping, write one log line per ms of a held bit
+        self.expand_log = expand_log
+        # simulate the switched networks frame by frame (frame_level.py)
+        self.frame_level = frame_level
+        # the switches store bits (Switch) or frames (Buffered_Switch)
+        if switch_buffers not in ("bit", "frame"):
+            raise InvalidValueOfConfigException("switch-buffers", switch_buffers)
+        self.switch_buffers = switch_buffers
+        # ms between two automatic checkpoints (0 is never), ms of the 
+        # other checkpoints and folder of the checkpoint files
+        self.checkpoint_every = 0
+        self.checkpoint_times = []
+        self.checkpoint_dir = None
+        # next ms at which a checkpoint is saved, None if there are no more checkpoints
+        self.next_checkpoint = None
+
+    def __getstate__(self):
+        ''' The phases replaced by the profiler are not saved, the restored 
+        simulation runs the phases of the class '''
+        state = self.__dict__.copy()
+        for name in PHASES:
+            state.pop(name, None)
+        return state
 
     #region Methods about execution simulation
+    def run(self):
+        ''' Simulate the network until the stop condition is reached '''
+        if self.frame_level and self.run_frames():
+            return
+        while True:
+            # the state between two ms is saved when a checkpoint is due
+            if self.next_checkpoint is not None and self.simulation_time >= self.next_checkpoint:
+                self.save_checkpoint()
+
+            # update the instructions that must be executed in the current simulation time
+            self.update_instructions()
+        
+            # clear devices 
+            self.clear_network_component()
+
+            # execute pending data sendings
+            self.execute_sending_device()
+            self.send_switch()
+
+            # execute the instructions of this time
+            self.execute_time_instructions()
+            self.read_host_wire()
+
+            # check if the simulation stop condition was reached
+            if self.must_stop():
+                break
+        
+            #then advance simulation time 
+            self.advance_simulation()
+
+    def run_frames(self):
+        ''' Simulate the network frame by frame, returns False if it must be 
+        simulated bit by bit (the network has hubs, see frame_level.py). 
+        The checkpoints and the restored simulations need the bit-level state, 
+        the frame-level simulation computes the timing of the Switch of bits '''
+        if self.next_checkpoint is not None:
+            reason = "the checkpoints need the bit-level state"
+        elif len(self.storage) != 0:
+            reason = "a restored simulation continues bit by bit"
+        elif self.switch_buffers != "bit":
+            reason = f"switch-buffers is {self.switch_buffers}"
+        else:
+            return Frame_Simulator(self).run()
+        print(f"frame-level: simulated bit by bit, {reason}")
+        return False
+
+    def set_checkpoints(self, every=0, times=(), folder="./checkpoints"):
+        ''' Save the simulation on folder every ms multiple of every (if 
+        it is not 0) and at the ms of times, the idle ms are skipped so 
+        a checkpoint is saved at the first simulated ms after it is due '''
+        self.checkpoint_every = every
+        self.checkpoint_times = sorted(times)
+        self.checkpoint_dir = folder
+        self.next_checkpoint = self.checkpoint_after(self.simulation_time - 1)
+
+    def checkpoint_after(self, time):
+        ''' First ms of a checkpoint after time, None if there is not one '''
+        due = [t for t in self.checkpoint_times if t > time]
+        if self.checkpoint_every > 0:
+            due.append((time // self.checkpoint_every + 1) * self.checkpoint_every)
+        return min(due) if len(due) != 0 else None
+
+    def save_checkpoint(self):
+        ''' Save the simulation on the checkpoint folder, the file is 
+        named by the current simulation time '''
+        import checkpoint
+
+        self.next_checkpoint = self.checkpoint_after(self.simulation_time)
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        checkpoint.save(self, path.join(self.checkpoint_dir, f"checkpoint_{self.simulation_time}.pkl"))
+
+    def close(self):
+        ''' write on disk the log lines of this simulation that are still in memory '''
+        Logger.close(self.output_dir)
+
     def clear_network_component(self):
-        for d in Storage_Device_Singleton.instance().devices:
+        ''' clean the components written in the previous ms, the others are already clean '''
+        table = self.storage.wire_table
+        for d in self.storage.dirty:
+            # with bit-period stepping the wires keep the held bits, the devices release them
+            # (the wires of the numpy backend are not dirty, the table cleans them at once)
+            if self.bit_period and isinstance(d, Wire):
+                continue
             d.clean() 
+        self.storage.dirty.clear()
+        if table is not None:
+            if self.bit_period:
+                table.forget()
+            else:
+                table.clean()
 
     def send_switch(self):
-        for i in Storage_Device_Singleton.instance().devices:
-            if isinstance(i, Switch):
-                if sum([1 if len(j) != 0 else 0 for j in i.port_information]) != 0:
-                    i.send()
+        for i in self.storage.switches:
+            if i.has_data():
+                i.send()
 
     def update_instructions(self):
         ''' update all the instructions that must be executed at any given 
         time in the network simulation and the pending instructions '''
-        self.time_instruction, length_new = self.get_all_instruction_at()
-        self.instructions = self.instructions[length_new:] if length_new < len(self.instructions) else []
+        self.time_instruction = self.get_all_instruction_at()
         self.pending = []
+        self.schedule_next_instruction()
     
     def get_all_instruction_at(self):
-        ''' Returns all the instructions that have to be executed at the given moment by time '''
+        ''' Returns all the instructions that have to be executed at the given moment by time,
+        the new instructions are consumed from the stream of instructions '''
 
         # instructions to return, not pending instructions, this list only contains instructions of new instructions
         rInstruction = []
         # select all instructions that must execute at this time
-        for _instruction in self.instructions:
-            if _instruction.time == self.simulation_time:
-                rInstruction.append(_instruction)
-            else: 
-                break
+        while len(self.instructions) != 0 and self.instructions.peek().time == self.simulation_time:
+            rInstruction.append(self.instructions.pop())
         # all the instructions are pending and new
-        return [self.pending + rInstruction, len(rInstruction)]
+        return self.pending + rInstruction
     
     def execute_sending_device(self):
         ''' execute data sends from all devices that are sending '''
@@ -68,73 +197,86 @@ class Simulator:
     def execute_time_instructions(self):
         ''' execute all the instructions that must be executed at this time '''
         for _i in self.time_instruction:
-            if not _i.execute():
+            if not _i.execute(self):
                 self.pending.append(_i)
                 _i.time += 1
+                # retry the instruction in the next ms
+                self.schedule(_i.time)
+
+    def schedule(self, time):
+        ''' schedule a time at which the simulation must be executed '''
+        heapq.heappush(self.events, time)
+
+    def schedule_next_instruction(self):
+        ''' schedule the time of the next instruction of the file '''
+        if len(self.instructions) != 0:
+            self.schedule(self.instructions.peek().time)
+
+    def is_busy(self):
+        ''' the network is busy if some device is sending, if there are 
+        pending instructions or if some switch has data to send, in 
+        that case the next ms can not be skipped '''
+        if len(self.sending_device) != 0 or len(self.pending) != 0:
+            return True
+        for i in self.storage.switches:
+            if i.has_data():
+                return True
+        return False
+
+    def needs_next_ms(self):
+        ''' the next ms can not be skipped if the network is busy, with 
+        bit-period stepping the devices schedule the start of their bit 
+        periods so only the pending instructions need the next ms '''
+        if self.bit_period:
+            return len(self.pending) != 0
+        return self.is_busy()
 
     def advance_simulation(self):
-        ''' advance simulation time in 1 ms'''
-        self.simulation_time += 1
+        ''' advance simulation time to the next time something happens 
+        on the network, the idle ms in between are skipped '''
+        if self.needs_next_ms():
+            self.schedule(self.simulation_time + 1)
+
+        next_time = self.simulation_time + 1
+        while len(self.events) != 0:
+            time = heapq.heappop(self.events)
+            if time > self.simulation_time:
+                next_time = time
+                break
+
+        # hosts keep its receive clock running while the channel is empty, 
+        # they catch up the skipped ms when they read again (Host.catch_up)
+        self.simulation_time = next_time
 
     def must_stop(self):
 
         ''' simulation stops if there are no instructions left in 
         the file if there are no pending instructions and no 
         device is currently sending '''
-        send_port_switch = 0
-        for i in Storage_Device_Singleton.instance().devices:
-            if isinstance(i, Switch):
-                send_port_switch += sum([1 if len(j) != 0 else 0 for j in i.port_information])
-        return sum([len(i) for i in [self.sending_device, self.pending, self.instructions]]) + send_port_switch == 0
+        return len(self.instructions) == 0 and not self.is_busy()
 
     def load_instruction(self, _path: str):
         ''' This function receive a path of file with the
-        instructions and parse the instruction. Return a list 
-        of Instructions '''
-        from instruction_factory_method import getInstruction
-        
+        instructions. Return a stream that parses the 
+        instructions lazily while the simulation consumes them '''
         if not path.isfile(_path):
             raise NonExistentInstructionFileException()
-        # open file
-        fd = open(_path)
-        # read from file
-        _content = fd.readlines()
-        # close file
-        fd.close()
-        # list to return list
-        _instructions = []
-
-        # parse all the instructions
-        for item in _content:
-            # tokenize instruction
-            sInstruction = item.split()
-            
-            # empty instruction then continue for 
-            if len(sInstruction) == 0:
-                continue
-            
-            # valid length of instruction
-            if len(sInstruction) < 3:
-                raise CorruptInstructionException()
-
-            # get values
-            time = int(sInstruction[0])
-            Itype = sInstruction[1]
-            args = sInstruction[2:]
-
-            _instructions.append(getInstruction(time, Itype, args))
-        return _instructions
+        return Instruction_Stream(_path, plan_cache=self.plan_cache)
 
     def read_host_wire(self):
-        for i in Storage_Device_Singleton.instance().devices:
-            if isinstance(i, Host):
-                i.read(True)
+        ''' only the hosts that received something in this ms read, the 
+        others catch up their receive clock when they read again '''
+        # the frames completed in this ms are checked together
+        completed = []
+        for i in sorted([d for d in self.storage.dirty if isinstance(d, Host)], key=lambda d: d.id):
+            i.read(True, completed)
+        check_received(completed)
     #endregion Methods about execution simulation
     
     #region Methods for event to query prop of simulation
     def getCountDevices(self):
         ''' get the number of devices at any given time on the network '''
-        return len(Storage_Device_Singleton.instance())
+        return len(self.storage)
 
     def getSimulationTime(self):
         ''' get current simulation time '''
@@ -146,9 +288,9 @@ class Simulator:
 
     def getDevices(self, i):
         ''' given an index get the device on the network '''
-        return Storage_Device_Singleton.instance().get_device(i)
+        return self.storage.get_device(i)
     
     def getDevicesMap(self, name):
         ''' given the name of a device get its index on the network '''
-        return Storage_Device_Singleton.instance().get_index(name)
+        return self.storage.get_index(name)
     #endregion Methods for event to query prop of simulation
\ No newline at end of file
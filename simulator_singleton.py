@@ -1,7 +1,34 @@
 from simulator import Simulator
 from initializer import Initializer
+from logger import Logger, TRACE_KINDS
+from profiler import Profiler
+from util import OUTPUT_DIR
+
+def create_simulator(init, output_dir=OUTPUT_DIR):
+    ''' Return a new simulator configured by init (an Initializer with 
+    the config loaded) that writes its log files on output_dir '''
+    # with the asynchronous mode the batches of the logs are written by a thread
+    queue_size = init.get("log-queue-size", 16) if init.get("log-async", False) else 0
+    binary = init.get("log-format", "text") == "binary"
+    if init.get("log-buffered", False) or (queue_size != 0 and not binary):
+        Logger.use_buffer(init.get("log-buffer-size", 4096), init.get("log-flush-interval", 1.0), init.get("log-max-open-files", 256), output_dir, queue_size)
+    if binary:
+        Logger.use_event_log(init.get("log-event-batch", 65536), output_dir, queue_size)
+    # kinds of events, devices (all of them if the list is empty) and sampling of the logs
+    Logger.use_trace(init.get("trace-kinds", list(TRACE_KINDS)), init.get("trace-devices", []) or None, init.get("trace-sample", {}), output_dir)
+
+    simulator = Simulator(init.get("signal-time"), init.get("script-name"), init.get("error-detection"), init.get("switch-mac-aging", 300000), init.get("switch-mac-table-size", 1024), init.get("bit-period", False), init.get("bit-period-expand-log", False), output_dir, init.get("wire-backend", "objects"), init.get("plan-cache", False) or None, init.get("frame-level", False), init.get("switch-buffers", "bit"))
+
+    if init.get("checkpoint-every", 0) or init.get("checkpoint-at", []):
+        simulator.set_checkpoints(init.get("checkpoint-every", 0), init.get("checkpoint-at", []), init.get("checkpoint-dir", "./checkpoints"))
+
+    if init.get("profile", False):
+        Profiler.enable(simulator, init.get("profile-output", output_dir + "/profile.json"))
+    return simulator
 
 class Simulator_Singleton:
+    ''' Simulator of config.txt that writes on ./output, other simulations 
+    can be created with create_simulator '''
     _instance = None
 
     @classmethod
@@ -9,6 +36,5 @@ class Simulator_Singleton:
         if cls._instance is None:
             init = Initializer()
             init.load_config()
-    
-            cls._instance = Simulator(init.get("signal-time"), init.get("script-name"), init.get("error-detection"))
-        return cls._instance
\ No newline at end of file
+            cls._instance = create_simulator(init)
+        return cls._instance
@@ -1,7 +1,22 @@
+from devices import Wire, Array_Wire, Switch, Resender
+
 class Storage_Device:
-    def __init__(self):
+    def __init__(self, wire_table=None):
         self.devices = []
         self.deviceMap = {}
+        # switches in order of creation, the simulator asks them for data every ms
+        self.switches = []
+        # topology index, links[device_id][port] is None if the port is not 
+        # connected, else (wire_id, peer_device_id, peer_port, send_colour) 
+        # where send_colour is True if the device sends by the red cable
+        self.links = []
+        # components written in the current ms, they are the only ones that must be cleaned
+        self.dirty = set()
+        # collision domains of the resenders by (device id, port), they are 
+        # computed when a bit is propagated and forgotten when a link changes
+        self.domains = {}
+        # Wire_Table with the channels of the wires (wire-backend numpy), None if every wire keeps its channels
+        self.wire_table = wire_table
 
     def get_device_with(self, name):
         return self.get_device(self.get_index(name)) 
@@ -17,17 +32,45 @@ class Storage_Device:
         return self.devices[i]
     
     def add(self, device):
-        self.deviceMap[device.name] = len(self)
+        device.id = len(self)
+        self.deviceMap[device.name] = device.id
         self.devices.append(device)
+        # the device reads its own row of the topology index
+        device.links = [None] * len(device.ports)
+        self.links.append(device.links)
+        device.dirty = self.dirty
+        if isinstance(device, Resender):
+            device.domains = self.domains
+        if isinstance(device, Switch):
+            self.switches.append(device)
 
-    def __len__(self):
-        return len(self.devices)
+    def new_wire(self, name, port_1, port_2):
+        ''' Return a new wire of the backend of the storage, it is not added '''
+        if self.wire_table is None:
+            return Wire(name, port_1, port_2)
+        return Array_Wire(name, port_1, port_2, self.wire_table)
+
+    def get_link(self, device_id, port):
+        ''' Return (wire_id, peer_device_id, peer_port, send_colour) of 
+        the port of a device, None if the port is not connected '''
+        return self.links[device_id][port]
 
-class Storage_Device_Singleton:
-    _instance = None
+    def connect(self, wire, device_1, port_1, device_2, port_2):
+        ''' Update the topology index when port_1 of device_1 is connected 
+        to port_2 of device_2 through wire, device_1 sends by red cable 
+        and device_2 sends by blue cable '''
+        self.links[device_1.id][port_1] = (wire.id, device_2.id, port_2, True)
+        self.links[device_2.id][port_2] = (wire.id, device_1.id, port_1, False)
+        self.domains.clear()
 
-    @classmethod
-    def instance(cls):
-        if cls._instance is None:
-            cls._instance = Storage_Device()
-        return cls._instance
\ No newline at end of file
+    def disconnect(self, device, port):
+        ''' Update the topology index when a port of a device is disconnected '''
+        link = self.links[device.id][port]
+        if link is None:
+            return
+        self.links[device.id][port] = None
+        self.links[link[1]][link[2]] = None
+        self.domains.clear()
+
+    def __len__(self):
+        return len(self.devices)
@@ -1,9 +1,22 @@
 from abc import ABCMeta, abstractmethod
+from frame import Frame
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# batches with less frames or less bytes of data are computed frame by
+# frame, the fixed cost of the array operations is greater than the loop
+VECTOR_MIN_FRAMES = 16
+VECTOR_MIN_BYTES = 1024
+
+def vectorized(datas):
+    ''' If the batch of datas is computed by array operations '''
+    return np is not None and len(datas) >= VECTOR_MIN_FRAMES and sum(map(len, datas)) >= VECTOR_MIN_BYTES
 
 class IStrategy_Detection(metaclass=ABCMeta):
     """Represent an strategy of error detections
     """
-    @abstractmethod
     def check(self, frame):
         """Check if a frame was send using this strategy
         Return a boolean
@@ -11,8 +24,81 @@ class IStrategy_Detection(metaclass=ABCMeta):
         Args:
             frame (str): Is an string representation of a frame
         """
-        pass
-    
+        return self.check_frame(Frame.from_bits(frame))
+
+    def check_frame(self, frame):
+        """Check if a frame was send using this strategy
+        Return a boolean
+
+        Args:
+            frame (Frame): Is a decoded frame
+        """
+        return bytes(frame.detection_code) == self.apply_bytes(frame.data)
+
+    def check_frames(self, frames):
+        """Check many decoded frames at once
+        Return a list of booleans, the same as check_frame of each frame
+
+        Args:
+            frames (list): Decoded frames
+        """
+        datas = [frame.data for frame in frames] if np is not None and len(frames) >= VECTOR_MIN_FRAMES else None
+        if datas is None or not vectorized(datas):
+            return [self.check_frame(frame) for frame in frames]
+        data, data_starts, data_ends = concatenate(datas)
+        codes, code_starts, code_ends = concatenate([frame.detection_code for frame in frames])
+        return self.check_segments(data, data_starts, data_ends, codes, code_starts, code_ends).tolist()
+
+    def check_many(self, buffer):
+        """Check the packed frames of a buffer (frames encoded one after
+        the other as Frame.encode does), for example the traffic of a log
+        Return a list of booleans, one per frame
+
+        Args:
+            buffer (bytes): Packed frames, any bytes-like object is valid
+        """
+        if np is None or len(buffer) < VECTOR_MIN_BYTES:
+            return [self.check_frame(frame) for frame in Frame.decode_many(buffer)]
+        data, data_starts, data_ends, code_starts, code_ends = packed_segments(buffer)
+        return self.check_segments(data, data_starts, data_ends, data, code_starts, code_ends).tolist()
+
+    def apply_many(self, datas):
+        """Apply a strategy detection over the data of many frames
+        Return a list with the detection code of each one as bytes, the
+        same as apply_bytes
+
+        Args:
+            datas (list): Bytes-like objects
+        """
+        if not vectorized(datas):
+            return [self.apply_bytes(data) for data in datas]
+        return self.apply_segments(*concatenate(datas))
+
+    def apply_segments(self, data, starts, ends):
+        """Apply the strategy over the segments data[starts[k]:ends[k]] of
+        a NumPy array of bytes, the strategies compute all of them with
+        array operations
+        Return a list with the detection code of each segment as bytes
+
+        Args:
+            data (ndarray): uint8 array
+            starts (ndarray): First index of every segment
+            ends (ndarray): Index after the last byte of every segment
+        """
+        return [self.apply_bytes(data[start:end].tobytes()) for start, end in zip(starts.tolist(), ends.tolist())]
+
+    def check_segments(self, data, data_starts, data_ends, codes, code_starts, code_ends):
+        """Check the frames whose data are the segments of data and whose
+        detection codes are the segments of codes (as apply_segments)
+        Return a boolean array, one per frame
+
+        Args:
+            data (ndarray): uint8 array with the data of the frames
+            codes (ndarray): uint8 array with the detection codes, it can be data
+        """
+        return np.array([self.check_frame(Frame(0, 0, data[ds:de].tobytes(), codes[cs:ce].tobytes()))
+            for ds, de, cs, ce in zip(data_starts.tolist(), data_ends.tolist(), code_starts.tolist(), code_ends.tolist())], dtype=bool)
+
     @abstractmethod
     def apply(self, data):
         """Apply a strategy detection over data
@@ -22,4 +108,62 @@ class IStrategy_Detection(metaclass=ABCMeta):
         """
         pass
 
-   
\ No newline at end of file
+    @abstractmethod
+    def apply_bytes(self, data):
+        """Apply a strategy detection over data, return the detection code as bytes
+
+        Args:
+            data (bytes): Data to send on a frame, any bytes-like object is valid
+        """
+        pass
+
+#region segments
+# the batches are arrays of bytes and the frames are segments [start, end) of them
+
+def concatenate(datas):
+    ''' Return the bytes of all the datas in one uint8 array and the start
+    and end of every data in it '''
+    lengths = np.fromiter(map(len, datas), dtype=np.int64, count=len(datas))
+    ends = np.cumsum(lengths)
+    return np.frombuffer(b"".join(datas), dtype=np.uint8), ends - lengths, ends
+
+def packed_segments(buffer):
+    ''' Return the bytes of the packed frames of a buffer as an uint8 array
+    (no copy is made) and the start and end of the data and of the detection
+    code of every frame. Only the sizes of the headers are read in Python '''
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    view = memoryview(buffer).cast("B")
+    header = Frame.HEADER.size
+    starts = []
+    start, end = 0, len(view)
+    while start < end:
+        starts.append(start)
+        start += header + view[start + header - 2] + view[start + header - 1]
+    starts = np.array(starts, dtype=np.int64)
+    data_starts = starts + header
+    # the last frame can be cut, as the memoryviews of Frame.decode_many
+    data_ends = np.minimum(data_starts + data[starts + header - 2], end)
+    code_ends = np.minimum(data_ends + data[starts + header - 1], end)
+    return data, data_starts, data_ends, data_ends, code_ends
+
+def ranges(starts, ends):
+    ''' Return the indexes of all the bytes of the segments, the segment of
+    every byte and its position in the segment '''
+    lengths = ends - starts
+    segment = np.repeat(np.arange(len(starts)), lengths)
+    first = np.cumsum(lengths) - lengths
+    position = np.arange(int(lengths.sum()), dtype=np.int64) - first[segment]
+    return starts[segment] + position, segment, position
+
+def prefix(values, ufunc, dtype):
+    ''' Array of dtype whose item i is the ufunc (add or bitwise_xor) of the
+    first i values, the result of a segment [start, end) is prefix[end] -
+    prefix[start] (or xor) '''
+    result = np.zeros(len(values) + 1, dtype=dtype)
+    ufunc.accumulate(values, dtype=dtype, out=result[1:])
+    return result
+
+def any_segment(mask, segment, count):
+    ''' If every one of count segments has an item of mask True '''
+    return np.bincount(segment[mask], minlength=count) != 0
+#endregion
@@ -0,0 +1,105 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+from exception import MissingDependencyException
+from util import INIT_FRAME_BIT
+
+# code of the bit of a channel, EMPTY is the code of a channel without bit
+VALUES = ['0', '1', INIT_FRAME_BIT]
+CODES = {bit: code for code, bit in enumerate(VALUES)}
+EMPTY = -1
+# offset of each channel of a wire
+RED, BLUE = 0, 1
+# the domains with less channels are checked channel by channel, the fixed
+# cost of an array operation is greater than the loop
+LOOP_CHANNELS = 16
+
+class Wire_Table:
+    ''' Channels of all the wires of a simulation in a NumPy array, the
+    wire of index row (its index of creation) has its red channel at
+    2 * row and its blue channel at 2 * row + 1 (an int8 code per channel,
+    EMPTY if there is no bit). The collision domains keep the indexes of
+    their channels (index), so they are checked and written at once, and
+    the channels written in the current ms are cleaned with one array
+    operation '''
+    def __init__(self, capacity=1024):
+        if np is None:
+            raise MissingDependencyException("numpy", "wire-backend numpy")
+        self.channels = np.full(2 * capacity, EMPTY, dtype=np.int8)
+        # number of rows in use
+        self.size = 0
+        # channels written one by one in the current ms
+        self.written = []
+        # index arrays of the collision domains written in the current ms
+        self.written_many = []
+
+    def add(self):
+        ''' Return the row of a new wire, the array doubles when it is full '''
+        if 2 * self.size == len(self.channels):
+            grown = np.full(2 * len(self.channels), EMPTY, dtype=np.int8)
+            grown[:len(self.channels)] = self.channels
+            self.channels = grown
+        self.size += 1
+        return self.size - 1
+
+    def index(self, rows, reds):
+        ''' Indexes of the channels (rows[k], reds[k]), as an array and, if 
+        there are less than LOOP_CHANNELS, as a list (else None) '''
+        index = [2 * row + (RED if red else BLUE) for row, red in zip(rows, reds)]
+        return np.array(index, dtype=np.intp), index if len(index) < LOOP_CHANNELS else None
+
+    def get(self, row, red):
+        code = self.channels.item(2 * row + (RED if red else BLUE))
+        return None if code == EMPTY else VALUES[code]
+
+    def set(self, row, red, bit):
+        ''' Write a bit (None empties the channel) without marking it as written '''
+        self.channels[2 * row + (RED if red else BLUE)] = EMPTY if bit is None else CODES[bit]
+
+    def write(self, row, red, bit):
+        i = 2 * row + (RED if red else BLUE)
+        self.channels[i] = EMPTY if bit is None else CODES[bit]
+        self.written.append(i)
+
+    def write_many(self, index, bit):
+        ''' Write a bit on the channels of an index with one array assignment '''
+        array, _ = index
+        self.channels[array] = EMPTY if bit is None else CODES[bit]
+        self.written_many.append(array)
+
+    def clean_row(self, row):
+        self.channels[2 * row:2 * row + 2] = EMPTY
+
+    def clean(self):
+        ''' Empty the channels written in the current ms '''
+        if len(self.written) == 1:
+            self.channels[self.written.pop()] = EMPTY
+        elif len(self.written) != 0:
+            self.channels[self.written] = EMPTY
+            self.written.clear()
+        if len(self.written_many) != 0:
+            for index in self.written_many:
+                self.channels[index] = EMPTY
+            self.written_many.clear()
+
+    def forget(self):
+        ''' Keep the written bits but start a new ms, the bit-period stepping
+        releases the held bits itself '''
+        self.written.clear()
+        self.written_many.clear()
+
+    def first_busy(self, index):
+        ''' Position in index of the first channel that has a bit, None if all are empty '''
+        array, small = index
+        if small is not None:
+            item = self.channels.item
+            for k, i in enumerate(small):
+                if item(i) != EMPTY:
+                    return k
+            return None
+        codes = self.channels[array]
+        # EMPTY is the smallest code
+        if codes.max() == EMPTY:
+            return None
+        return int(np.argmax(codes != EMPTY))